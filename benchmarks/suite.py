@@ -0,0 +1,312 @@
+'''
+Benchmarks of fluteline's hot paths.
+
+Reports throughput and, for whole lines, p50/p99 end-to-end latency.
+
+    python benchmarks/suite.py [--messages N] [--only NAME] [--json PATH]
+
+``--json`` writes the results as a JSON document, for tracking regressions
+across releases.
+'''
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+
+import fluteline
+from fluteline import numeric
+from fluteline.queues import monotonic
+
+
+class Forward(fluteline.Consumer):
+    def consume(self, msg):
+        self.output.put(msg)
+
+
+class SynchronousForward(fluteline.SynchronousConsumer):
+    def consume(self, msg):
+        self.output.put(msg)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+def result(name, n, elapsed, latencies=None, **params):
+    record = {
+        'benchmark': name,
+        'params': params,
+        'messages': n,
+        'seconds': elapsed,
+        'throughput': n / elapsed,
+    }
+    if latencies:
+        record['p50_latency'] = percentile(latencies, 50)
+        record['p99_latency'] = percentile(latencies, 99)
+    return record
+
+
+def bench_queue(n):
+    '''
+    ``put`` followed by ``get`` in a single thread.
+    '''
+    for queue_class in [fluteline.Queue, fluteline.RingQueue]:
+        q = queue_class()
+        start = monotonic()
+        for i in range(n):
+            q.put(i)
+        for i in range(n):
+            q.get()
+        elapsed = monotonic() - start
+        yield result('queue', n, elapsed, queue=queue_class.__name__)
+
+    path = tempfile.mkdtemp()
+    try:
+        for sync_every in [1, 1000]:
+            q = fluteline.PersistentQueue(path, sync_every=sync_every)
+            start = monotonic()
+            for i in range(n):
+                q.put(i)
+            for i in range(n):
+                q.get()
+            q.sync()
+            elapsed = monotonic() - start
+            q.close()
+            yield result(
+                'queue', n, elapsed,
+                queue='PersistentQueue', sync_every=sync_every,
+            )
+    finally:
+        shutil.rmtree(path)
+
+
+def bench_hop(n):
+    '''
+    One producer thread and one consumer thread around a queue.
+    '''
+    for queue_class in [fluteline.Queue, fluteline.RingQueue]:
+        q = queue_class()
+
+        def produce():
+            for i in range(n):
+                q.put(i)
+
+        producer = threading.Thread(target=produce)
+        start = monotonic()
+        producer.start()
+        for _ in range(n):
+            q.get()
+        elapsed = monotonic() - start
+        producer.join()
+        yield result('hop', n, elapsed, queue=queue_class.__name__)
+
+
+def bench_put(n):
+    '''
+    The cost of ``put`` on a consumer, without consuming.
+    '''
+    consumer = Forward()
+    start = monotonic()
+    for i in range(n):
+        consumer.put(i)
+    yield result('put', n, monotonic() - start, node='Consumer')
+
+    consumer = SynchronousForward()
+    consumer.output = fluteline.Queue()
+    start = monotonic()
+    for i in range(n):
+        consumer.put(i)
+    yield result('put', n, monotonic() - start, node='SynchronousConsumer')
+
+
+def run_line(nodes, n, payload):
+    '''
+    Push ``n`` timestamped messages through a connected line, collecting
+    the outputs in another thread. Return the elapsed time and latencies.
+    '''
+    fluteline.connect(nodes)
+    fluteline.start(nodes)
+    output = nodes[-1].output
+    latencies = []
+
+    def collect():
+        for _ in range(n):
+            sent = output.get()[0]
+            latencies.append(monotonic() - sent)
+
+    collector = threading.Thread(target=collect)
+    collector.start()
+    start = monotonic()
+    for _ in range(n):
+        nodes[0].put((monotonic(), payload))
+    collector.join()
+    elapsed = monotonic() - start
+    fluteline.stop(nodes)
+    return elapsed, latencies
+
+
+def bench_line(n, maxsize):
+    '''
+    Lines of threaded or synchronous consumers of varying length and
+    message size.
+    '''
+    node_classes = [Forward, SynchronousForward]
+    for node_class in node_classes:
+        for length in [1, 2, 4, 8]:
+            for size in [8, 1024, 65536]:
+                if node_class is Forward:
+                    nodes = [node_class(maxsize) for _ in range(length)]
+                else:
+                    nodes = [node_class() for _ in range(length)]
+                elapsed, latencies = run_line(nodes, n, b'x' * size)
+                yield result(
+                    'line', n, elapsed, latencies,
+                    node=node_class.__name__, length=length, size=size,
+                )
+
+
+def bench_pull(n):
+    '''
+    Lines of forwarding consumers pulled in the calling thread, to compare
+    with the threaded ``line`` benchmark.
+    '''
+    for length in [1, 2, 4, 8]:
+        nodes = [Forward() for _ in range(length)]
+        start = monotonic()
+        for _ in fluteline.pull(nodes, source=range(n)):
+            pass
+        yield result('pull', n, monotonic() - start, length=length)
+
+
+def bench_fan_out(n, maxsize):
+    '''
+    A pool of forwarding workers sharing one input queue.
+    '''
+    for size in [1, 2, 4]:
+        pool = fluteline.Pool(lambda: Forward(maxsize), size)
+        elapsed, latencies = run_line([pool], n, b'')
+        yield result('fan_out', n, elapsed, latencies, workers=size)
+
+
+class RunningMax(fluteline.Consumer):
+    def enter(self):
+        self.max_ = None
+
+    def consume(self, msg):
+        if self.max_ is None or msg > self.max_:
+            self.max_ = msg
+        self.output.put(self.max_)
+
+
+def bench_frames(n):
+    '''
+    A running max of ``n`` floats, one message per value or in frames.
+    '''
+    def run(node, msgs, count):
+        nodes = [node]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        start = monotonic()
+        node.put_many(msgs)
+        for _ in range(count):
+            node.output.get()
+        elapsed = monotonic() - start
+        fluteline.stop(nodes)
+        return elapsed
+
+    values = [float(i % 1000) for i in range(n)]
+    yield result('frames', n, run(RunningMax(), values, n), size=1)
+    functions = [max]
+    if numeric.numpy is not None:
+        functions.append(numeric.numpy.maximum)
+    for function in functions:
+        for size in [64, 1024]:
+            frames = [
+                fluteline.as_frame(values[i:i + size])
+                for i in range(0, n, size)
+            ]
+            node = fluteline.ScanFrames(function)
+            yield result(
+                'frames', n, run(node, frames, len(frames)),
+                size=size, function=function.__name__,
+            )
+
+
+def bench_codec(n):
+    '''
+    Encoding and decoding small messages, with and without framing.
+    '''
+    tuples = [(i, i * 0.5) for i in range(n)]
+    dicts = [{'id': i, 'value': i * 0.5} for i in range(n)]
+    codecs = [
+        ('pickle2', fluteline.PickleCodec(2), dicts),
+        ('pickle', fluteline.PickleCodec(), dicts),
+        ('struct', fluteline.StructCodec('<qd'), tuples),
+        ('struct_dict', fluteline.StructCodec('<qd', ('id', 'value')), dicts),
+    ]
+    for name, codec, msgs in codecs:
+        start = monotonic()
+        encoded = [codec.encode(msg) for msg in msgs]
+        yield result('encode', n, monotonic() - start, codec=name)
+        start = monotonic()
+        for frames in encoded:
+            codec.decode(frames)
+        yield result('decode', n, monotonic() - start, codec=name)
+        start = monotonic()
+        stream = b''.join(
+            bytes(buf) for frames in encoded for buf in fluteline.frame(frames)
+        )
+        for frames in fluteline.FrameReader().feed(stream):
+            codec.decode(frames)
+        yield result('framed', n, monotonic() - start, codec=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--maxsize', type=int, default=1000)
+    parser.add_argument('--only', action='append')
+    parser.add_argument('--json')
+    args = parser.parse_args()
+
+    benchmarks = {
+        'codec': lambda: bench_codec(args.messages),
+        'queue': lambda: bench_queue(args.messages),
+        'hop': lambda: bench_hop(args.messages),
+        'put': lambda: bench_put(args.messages),
+        'line': lambda: bench_line(args.messages, args.maxsize),
+        'fan_out': lambda: bench_fan_out(args.messages, args.maxsize),
+        'frames': lambda: bench_frames(args.messages),
+        'pull': lambda: bench_pull(args.messages),
+    }
+    results = []
+    for name in args.only or sorted(benchmarks):
+        for record in benchmarks[name]():
+            results.append(record)
+            params = ' '.join(
+                '{}={}'.format(k, v) for k, v in sorted(record['params'].items())
+            )
+            latency = ''
+            if 'p50_latency' in record:
+                latency = 'p50={:.1f}us p99={:.1f}us'.format(
+                    record['p50_latency'] * 1e6, record['p99_latency'] * 1e6,
+                )
+            print('{:<8} {:<45} {:>12,.0f} msgs/sec {}'.format(
+                record['benchmark'], params, record['throughput'], latency,
+            ))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'python': sys.version,
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import random
+import time
+
+import fluteline
+
+try:
+    import numpy
+    maximum = numpy.maximum
+except ImportError:
+    maximum = max
+
+
+class RandomFrameGenerator(fluteline.Producer):
+    rate = 10  # frames per second
+
+    def produce(self):
+        frame = fluteline.as_frame([random.random() for _ in range(100)])
+        self.output.put(frame)
+
+
+class NewMaxima(fluteline.Consumer):
+    def enter(self):
+        self.max_ = None
+
+    def consume(self, frame):
+        # The running max only changes when there's a new maximum
+        if self.max_ is None or frame[-1] > self.max_:
+            self.output.put(frame[-1])
+            self.max_ = frame[-1]
+
+
+class Printer(fluteline.Consumer):
+    def consume(self, item):
+        print(item)
+
+
+def main():
+    nodes = [
+        RandomFrameGenerator(),
+        fluteline.ScanFrames(maximum),
+        NewMaxima(),
+        Printer(),
+    ]
+    fluteline.connect(nodes)
+    fluteline.start(nodes)
+
+    time.sleep(5)
+
+    fluteline.stop(nodes)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,8 @@ import fluteline
 
 
 class RandomNumberGenerator(fluteline.Producer):
+    rate = 1000  # numbers per second
+
     def produce(self):
         number = random.random()
         self.output.put(number)
@@ -1,3 +1,36 @@
 from .nodes import Node, Producer, Consumer, SynchronousConsumer
+from .events import SelectorProducer
+from .fusion import fuse
+from .graph import Graph, Broadcast, RoundRobin, Partition
+from .instrumentation import NodeStats, Reporter, instrument, stats
+from .lazy import pull
+from .numeric import (
+    Chunk, Unchunk, MapFrames, FilterFrames, ScanFrames, as_frame,
+)
+from .persistence import PersistentQueue
+from .pools import Pool
+from .processes import ProcessProducer, ProcessConsumer
+from .remote import RemoteSink, RemoteSource
+from .rewiring import insert_node, remove_node, replace_node
+from .scaling import Autoscaler
+from .serialization import (
+    Codec, PickleCodec, StructCodec, FrameReader, frame,
+)
+from .supervision import DeadLetter, Supervisor, supervise
+from .tracing import Histogram, Tracer, trace
+from .windows import CountWindow, TimeWindow
 from .utils import connect, start, stop
-from .queues import Queue
+from .queues import (
+    Queue, PriorityQueue, RingQueue, ProcessQueue,
+    Full, BLOCK, DROP_NEWEST, DROP_OLDEST, RAISE,
+)
+
+try:
+    from .aio import AsyncProducer, AsyncConsumer, AsyncQueue
+except SyntaxError:  # python 2
+    pass
+
+try:
+    from .shm import SharedBuffer, SharedMemoryPool, SharedMemoryQueue
+except ImportError:  # python < 3.8
+    pass
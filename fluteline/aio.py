@@ -0,0 +1,293 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+from . import nodes
+from . import queues
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncQueue(queues.RingQueue):
+    '''
+    Bridge queue from any thread into the event loop.
+
+    ``put`` and ``put_many`` are regular methods that can be called from
+    any number of threaded nodes or from coroutines, while ``get`` and
+    ``get_many`` are coroutines for the single async consumer. With several
+    producers, ``maxsize`` may be exceeded by one item per producer.
+
+    The ``BLOCK`` overflow policy blocks the calling thread, so putting
+    into a full queue from the event loop itself would never return, and
+    raises ``RuntimeError`` instead. Use another policy for queues fed by
+    async nodes.
+    '''
+    _replaceable = False
+
+    def __init__(self, maxsize=0, overflow=queues.BLOCK):
+        super(AsyncQueue, self).__init__(maxsize, overflow)
+        self._loop = None
+        self._waiter = None
+        self._put_lock = threading.Lock()
+
+    async def get(self):
+        '''
+        Remove and return an item from the queue.
+        '''
+        if self._control:
+            return self._control.popleft()
+        while True:
+            try:
+                item = self._ring.popleft()
+                break
+            except IndexError:
+                if self._control:
+                    return self._control.popleft()
+                await self._wait_async()
+        if self._putter_waiting:
+            self._not_full.set()
+        return item
+
+    async def get_many(self, max_items, timeout=0):
+        '''
+        Remove and return a list of up to ``max_items`` items. See
+        :meth:`Queue.get_many`.
+        '''
+        items = [await self.get()]
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+        ring = self._ring
+        control = self._control
+        while not isinstance(items[-1], queues._Control):
+            if control:
+                items.append(control.popleft())
+                break
+            while ring and len(items) < max_items:
+                item = ring.popleft()
+                items.append(item)
+                if isinstance(item, queues._Control):
+                    break
+            if self._putter_waiting:
+                self._not_full.set()
+            remaining = deadline - loop.time()
+            if len(items) >= max_items or remaining <= 0 or (
+                isinstance(items[-1], queues._Control)
+            ):
+                return items
+            await self._wait_async(remaining)
+        if self._putter_waiting:
+            self._not_full.set()
+        return items
+
+    def _make_room(self):
+        if self.overflow != queues.BLOCK:
+            return super(AsyncQueue, self)._make_room()
+        if _scheduler.in_loop():
+            raise RuntimeError(
+                'Blocking on a full AsyncQueue would stall the event loop'
+            )
+        # The ring wakes up a single waiting putter, so producers take turns
+        with self._put_lock:
+            return super(AsyncQueue, self)._make_room()
+
+    def _notify_getter(self):
+        waiter = self._waiter
+        if waiter is not None:
+            self._loop.call_soon_threadsafe(_wake, waiter)
+
+    async def _wait_async(self, timeout=None):
+        self._loop = asyncio.get_event_loop()
+        self._waiter = self._loop.create_future()
+        self._getter_waiting = True
+        try:
+            if not self._ring and not self._control:
+                await asyncio.wait_for(self._waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._getter_waiting = False
+            self._waiter = None
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _Scheduler(object):
+    '''
+    Run one event loop in a background thread for as long as there are
+    running async nodes.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._running = 0
+
+    def run(self, coro):
+        '''
+        Schedule a coroutine on the loop and return a
+        ``concurrent.futures.Future`` of its result.
+        '''
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._run_forever, args=(self._loop,),
+                )
+                thread.daemon = True
+                thread.start()
+                self._thread = thread
+            self._running += 1
+            future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        future.add_done_callback(self._release)
+        return future
+
+    def in_loop(self):
+        '''
+        Return ``True`` if called from the event loop's thread.
+        '''
+        return threading.current_thread() is self._thread
+
+    def _release(self, future):
+        with self._lock:
+            self._running -= 1
+            if not self._running:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    @staticmethod
+    def _run_forever(loop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+
+_scheduler = _Scheduler()
+
+
+class _Async(object):
+    '''
+    Same lifecycle as threaded nodes, but runs as a task on the shared
+    event loop.
+    '''
+    def __init__(self):
+        self._stopping = False
+        self._future = None
+
+    def start(self):
+        self._future = _scheduler.run(self._run())
+        self._future.add_done_callback(self._report)
+
+    def stop(self):
+        self._stopping = True
+
+    def join(self, timeout=None):
+        if self._future is not None:
+            concurrent.futures.wait([self._future], timeout)
+
+    def _report(self, future):
+        '''
+        Log the exception a node crashed with, as nothing awaits its task.
+        '''
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(
+                '%s crashed', type(self).__name__,
+                exc_info=future.exception(),
+            )
+
+    def is_alive(self):
+        return self._future is not None and not self._future.done()
+
+    async def _run(self):
+        self.enter()
+        try:
+            while not self._stopping:
+                await self._loop()
+        finally:
+            self.exit()
+
+    async def _loop(self):
+        pass
+
+
+class AsyncProducer(_Async, nodes.Node):
+    '''
+    Same as :class:`Producer`, but ``produce`` is a coroutine.
+
+    All async nodes share one event loop, started and stopped with them.
+    '''
+    async def produce(self):
+        '''
+        Override to produce new messages.
+        '''
+        pass
+
+    async def _loop(self):
+        await self.produce()
+        await asyncio.sleep(0)
+
+
+class AsyncConsumer(_Async, nodes.Node):
+    '''
+    Same as :class:`Consumer`, but ``consume`` is a coroutine.
+
+    ``put`` is thread-safe, so threaded nodes can feed async nodes and vice
+    versa.
+
+    :var input: An input queue to accept messages.
+    :vartype input: AsyncQueue
+    '''
+    def __init__(self, maxsize=0, overflow=queues.BLOCK):
+        super(AsyncConsumer, self).__init__()
+        self.input = AsyncQueue(maxsize, overflow)
+
+    async def consume(self, msg):
+        '''
+        Override to consume messages.
+        '''
+        pass
+
+    def put(self, msg):
+        '''
+        Send a message to this consumer.
+        '''
+        self.input.put(msg)
+
+    def put_many(self, msgs):
+        '''
+        Send a list of messages to this consumer.
+        '''
+        self.input.put_many(msgs)
+
+    async def control(self, msg):
+        '''
+        Override to handle control messages.
+        '''
+        pass
+
+    def put_control(self, msg):
+        '''
+        Send a control message, handled by ``control`` before the data
+        messages already queued.
+        '''
+        self.input.put_control(nodes._Control(msg))
+
+    def stop(self, drain=True, timeout=None):
+        message = nodes._TerminationMessage()
+        if drain and self.input._put_blocking(message, timeout):
+            return
+        self.input.put_control(message)
+
+    async def _loop(self):
+        msg = await self.input.get()
+        if isinstance(msg, nodes._TerminationMessage):
+            self._stopping = True
+        elif isinstance(msg, nodes._Control):
+            await self.control(msg.msg)
+        else:
+            await self.consume(msg)
@@ -0,0 +1,124 @@
+import collections
+import select
+import socket
+
+try:
+    import selectors  # python 3
+except ImportError:
+    selectors = None
+
+from . import nodes
+from . import queues
+
+_READ = getattr(selectors, 'EVENT_READ', 1)
+_Key = collections.namedtuple('_Key', 'fileobj')
+
+
+class _SelectSelector(object):
+    '''
+    The part of ``selectors.DefaultSelector`` used by
+    :class:`SelectorProducer`, on top of ``select.select`` for python 2.
+    '''
+    def __init__(self):
+        self._sources = []
+
+    def register(self, source, events):
+        self._sources.append(source)
+
+    def unregister(self, source):
+        self._sources.remove(source)
+
+    def select(self):
+        ready = select.select(self._sources, [], [])[0]
+        return [(_Key(source), _READ) for source in ready]
+
+    def close(self):
+        self._sources = []
+
+
+class SelectorProducer(nodes.Producer):
+    '''
+    A producer that sleeps until one of its sources is ready for reading.
+
+    Override ``sources`` to return the file objects (sockets, pipes, ...)
+    or file descriptors to wait on, and ``produce`` to read from a ready
+    source. ``sources`` is called after ``enter``, so it can return what
+    ``enter`` opened. ``stop`` wakes the producer up immediately.
+
+    Pacing attributes (``rate``, ``high_water``) don't apply.
+    '''
+    def __init__(self):
+        super(SelectorProducer, self).__init__()
+        self._stop_reader = self._stop_writer = None
+        self._selector = None
+
+    def sources(self):
+        '''
+        Override to return the sources to wait on.
+        '''
+        return []
+
+    def produce(self, source):
+        '''
+        Override to produce new messages from a ready source.
+        '''
+        pass
+
+    def register(self, source):
+        '''
+        Start waiting on another source. Call from ``produce``.
+        '''
+        self._selector.register(source, _READ)
+
+    def unregister(self, source):
+        '''
+        Stop waiting on a source. Call from ``produce``.
+        '''
+        self._selector.unregister(source)
+
+    def start(self):
+        # Created here rather than in __init__, so that a producer that is
+        # never started doesn't hold sockets
+        self._stop_reader, self._stop_writer = socket.socketpair()
+        super(SelectorProducer, self).start()
+
+    def stop(self):
+        super(SelectorProducer, self).stop()
+        if self._stop_writer is None:
+            return  # Not started
+        try:
+            self._stop_writer.send(b'\0')
+        except socket.error:
+            pass  # Already stopped
+
+    def run(self):
+        try:
+            super(SelectorProducer, self).run()
+        finally:
+            if self._selector is not None:
+                self._selector.close()
+            self._stop_reader.close()
+            self._stop_writer.close()
+
+    def _select_loop(self):
+        if selectors is None:
+            selector = self._selector = _SelectSelector()
+        else:
+            selector = self._selector = selectors.DefaultSelector()
+        for source in self.sources():
+            selector.register(source, _READ)
+        selector.register(self._stop_reader, _READ)
+        stats = self.stats
+
+        def loop():
+            for key, _ in selector.select():
+                if self._stopping or key.fileobj is self._stop_reader:
+                    return
+                if stats is None:
+                    self.produce(key.fileobj)
+                else:
+                    start = queues.monotonic()
+                    self.produce(key.fileobj)
+                    stats.busy_time += queues.monotonic() - start
+
+        return loop
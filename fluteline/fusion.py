@@ -0,0 +1,78 @@
+import logging
+
+from . import nodes
+from . import processes
+
+logger = logging.getLogger(__name__)
+
+
+def _fusible(node):
+    return (
+        isinstance(node, nodes.Consumer) and
+        not isinstance(node, processes._Processed) and
+        node.fusible and
+        not node.batch_size
+    )
+
+
+def fuse(nodes):
+    '''
+    Fuse runs of adjacent, connected consumers so each run executes in the
+    thread of its first consumer.
+
+    The other consumers of the run are called directly instead of through
+    their input queue, like a :class:`SynchronousConsumer`, and their
+    ``enter`` and ``exit`` are called by the first consumer's thread.
+    Set ``fusible = False`` on consumers that shouldn't be fused, e.g.
+    ones that block for long. Must be called after connecting the nodes
+    and before starting them.
+
+    Return the fusion plan: a list of runs, each a list of nodes sharing a
+    thread.
+    '''
+    plan = []
+    run = []
+    for node in nodes:
+        if _fusible(node) and run and run[-1].output is node:
+            run.append(node)
+            continue
+        if len(run) > 1:
+            plan.append(run)
+        run = [node] if _fusible(node) else []
+    if len(run) > 1:
+        plan.append(run)
+    for run in plan:
+        _fuse_run(run[0], run[1:])
+        logger.info(
+            'Fused %s into one thread',
+            ', '.join(type(node).__name__ for node in run),
+        )
+    return plan
+
+
+def _fuse_run(head, rest):
+    head_enter, head_exit = head.enter, head.exit
+
+    def fused_enter():
+        head_enter()
+        for node in rest:
+            node.enter()
+
+    def fused_exit():
+        head_exit()
+        for node in rest:
+            node.exit()
+
+    head.enter = fused_enter
+    head.exit = fused_exit
+    for node in rest:
+        node.put = node.consume
+        node.put_many = node.consume_batch
+        node.put_control = node.control
+        node.start = node.stop = _noop
+        node.join = head.join
+        node.is_alive = head.is_alive
+
+
+def _noop(*args, **kwargs):
+    pass
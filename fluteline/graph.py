@@ -0,0 +1,162 @@
+import itertools
+
+from . import queues
+from . import utils
+
+
+class Broadcast(object):
+    '''
+    An ``output`` that puts every message into all of ``outputs``.
+
+    The same message object is shared by all of them, so don't mutate it.
+    '''
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+
+    def put(self, msg):
+        for output in self.outputs:
+            output.put(msg)
+
+    def put_many(self, msgs):
+        for output in self.outputs:
+            output.put_many(msgs)
+
+
+class RoundRobin(object):
+    '''
+    An ``output`` that puts each message into the next of ``outputs`` in
+    turn.
+    '''
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self._cycle = itertools.cycle(self.outputs)
+
+    def put(self, msg):
+        next(self._cycle).put(msg)
+
+    def put_many(self, msgs):
+        for msg in msgs:
+            next(self._cycle).put(msg)
+
+
+class Partition(object):
+    '''
+    An ``output`` that puts each message into one of ``outputs`` by the hash
+    of ``key(msg)``, so messages with the same key always reach the same
+    output, in order.
+    '''
+    def __init__(self, outputs, key=None):
+        self.outputs = list(outputs)
+        self.key = key or (lambda msg: msg)
+
+    def put(self, msg):
+        self.outputs[hash(self.key(msg)) % len(self.outputs)].put(msg)
+
+    def put_many(self, msgs):
+        parts = [[] for _ in self.outputs]
+        for msg in msgs:
+            parts[hash(self.key(msg)) % len(parts)].append(msg)
+        for output, part in zip(self.outputs, parts):
+            if part:
+                output.put_many(part)
+
+
+class Graph(object):
+    '''
+    Connect nodes in any directed acyclic topology, not just a line.
+
+    Nodes without downstream nodes get a :class:`Queue` as ``output``, like
+    the last node of :func:`connect`. Several upstream nodes can share one
+    downstream node, whose input must then support many producers (i.e. not
+    a :class:`RingQueue`).
+
+    :var nodes: The nodes in the graph, in the order they were added.
+    '''
+    def __init__(self):
+        self.nodes = []
+        self._downstream = {}
+
+    def add(self, node):
+        '''
+        Add a node without connecting it.
+        '''
+        if id(node) not in self._downstream:
+            self.nodes.append(node)
+            self._downstream[id(node)] = []
+            if getattr(node, 'output', None) is None:
+                node.output = queues.Queue()
+        return node
+
+    def connect(self, upstream, downstream):
+        '''
+        Send the output of ``upstream`` to ``downstream``.
+        '''
+        self._route(upstream, [downstream], downstream)
+
+    def merge(self, upstreams, downstream):
+        '''
+        Send the outputs of all ``upstreams`` to ``downstream``.
+        '''
+        for upstream in upstreams:
+            self.connect(upstream, downstream)
+
+    def broadcast(self, upstream, downstreams):
+        '''
+        Send every output message of ``upstream`` to all ``downstreams``.
+        '''
+        self._route(upstream, downstreams, Broadcast(downstreams))
+
+    def round_robin(self, upstream, downstreams):
+        '''
+        Spread the output messages of ``upstream`` over ``downstreams``.
+        '''
+        self._route(upstream, downstreams, RoundRobin(downstreams))
+
+    def partition(self, upstream, downstreams, key=None):
+        '''
+        Spread the output messages of ``upstream`` over ``downstreams`` by
+        the hash of ``key(msg)``.
+        '''
+        self._route(upstream, downstreams, Partition(downstreams, key))
+
+    def order(self):
+        '''
+        Return the nodes in topological order, upstream nodes first.
+        '''
+        indegree = dict((id(node), 0) for node in self.nodes)
+        for downstreams in self._downstream.values():
+            for node in downstreams:
+                indegree[id(node)] += 1
+        ready = [node for node in self.nodes if not indegree[id(node)]]
+        ordered = []
+        while ready:
+            node = ready.pop(0)
+            ordered.append(node)
+            for downstream in self._downstream[id(node)]:
+                indegree[id(downstream)] -= 1
+                if not indegree[id(downstream)]:
+                    ready.append(downstream)
+        if len(ordered) != len(self.nodes):
+            raise ValueError('The graph has a cycle')
+        return ordered
+
+    def start(self):
+        '''
+        Start all the nodes, downstream nodes first.
+        '''
+        utils.start(list(reversed(self.order())))
+
+    def stop(self, timeout=None, drain=True):
+        '''
+        Stop all the nodes, upstream nodes first. See :func:`stop`.
+        '''
+        return utils.stop(self.order(), timeout, drain)
+
+    def _route(self, upstream, downstreams, output):
+        self.add(upstream)
+        if self._downstream[id(upstream)]:
+            raise ValueError('{!r} is already connected'.format(upstream))
+        for node in downstreams:
+            self.add(node)
+        self._downstream[id(upstream)].extend(downstreams)
+        upstream.output = output
@@ -0,0 +1,116 @@
+import logging
+
+from .nodes import Producer, _Threaded
+
+logger = logging.getLogger(__name__)
+
+
+class NodeStats(object):
+    '''
+    Counters of an instrumented node.
+
+    :var messages_in: Messages consumed.
+    :var messages_out: Messages put into the node's ``output``.
+    :var busy_time: Seconds spent in ``consume`` or ``produce``.
+    :var wait_time: Seconds spent waiting for input.
+    '''
+    __slots__ = ('messages_in', 'messages_out', 'busy_time', 'wait_time')
+
+    def __init__(self):
+        self.messages_in = 0
+        self.messages_out = 0
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+
+
+class _CountingOutput(object):
+    '''
+    Wrap a node's ``output`` to count the messages put into it.
+    '''
+    def __init__(self, output, stats):
+        self.wrapped = output
+        self._stats = stats
+
+    def put(self, msg):
+        self._stats.messages_out += 1
+        self.wrapped.put(msg)
+
+    def put_many(self, msgs):
+        self._stats.messages_out += len(msgs)
+        self.wrapped.put_many(msgs)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+def instrument(nodes):
+    '''
+    Enable instrumentation of threaded nodes. Call after :func:`connect`
+    and before :func:`start`.
+
+    Nodes that aren't instrumented pay nothing for it. Nodes running in
+    other processes can't be instrumented.
+    '''
+    for node in nodes:
+        if hasattr(node, 'workers'):
+            instrument(node.workers)
+            continue
+        if not isinstance(node, _Threaded):
+            continue
+        if node.stats is None:
+            node.stats = NodeStats()
+        output = getattr(node, 'output', None)
+        if output is not None and not isinstance(output, _CountingOutput):
+            node.output = _CountingOutput(output, node.stats)
+
+
+def stats(nodes):
+    '''
+    Return a snapshot of the nodes' statistics, as a list of dicts.
+
+    Counters are ``None`` for nodes that aren't instrumented, and summed
+    over the workers of a :class:`Pool`. Queue depth, dropped items and
+    blocked time are taken from the node's input queue.
+    '''
+    snapshot = []
+    for node in nodes:
+        queue = getattr(node, 'input', None)
+        entry = {'name': type(node).__name__}
+        workers = getattr(node, 'workers', [node])
+        for field in NodeStats.__slots__:
+            values = [
+                getattr(worker.stats, field) for worker in workers
+                if getattr(worker, 'stats', None) is not None
+            ]
+            entry[field] = sum(values) if values else None
+        entry['queue_depth'] = queue.qsize() if queue is not None else None
+        entry['dropped'] = getattr(queue, 'dropped', None)
+        entry['blocked_time'] = getattr(queue, 'blocked_time', None)
+        snapshot.append(entry)
+    return snapshot
+
+
+class Reporter(Producer):
+    '''
+    Produce a :func:`stats` snapshot of ``nodes`` every ``interval``
+    seconds.
+
+    Connect it to a consumer of your choice, or leave its ``output`` unset
+    to log the snapshots.
+    '''
+    def __init__(self, nodes, interval=1.0):
+        super(Reporter, self).__init__()
+        self.nodes = nodes
+        self.interval = interval
+        self.output = None
+
+    def produce(self):
+        self._sleep(self.interval)
+        if self._stopping:
+            return
+        snapshot = stats(self.nodes)
+        if self.output is None:
+            for entry in snapshot:
+                logger.info('%s', entry)
+        else:
+            self.output.put(snapshot)
@@ -0,0 +1,98 @@
+import itertools
+
+from .nodes import Consumer, Producer, SynchronousConsumer
+from .pools import _Collector
+
+
+def pull(nodes, source=None):
+    '''
+    Run a line of nodes in the calling thread, as a chain of generators,
+    and return a generator of the last node's outputs. No threads or
+    queues are involved, and items are only produced and consumed as the
+    outputs are pulled.
+
+    The first node is either a :class:`Producer`, whose ``produce`` is
+    called until it calls ``self.stop()``, or a consumer fed with the items
+    of the ``source`` iterable. The other nodes are :class:`Consumer` or
+    :class:`SynchronousConsumer` instances, whose ``output.put`` calls are
+    collected. A consumer with ``batch_size`` gets full batches, except
+    maybe the last one.
+
+    ``enter`` is called on all the nodes when the generator starts. When
+    the input runs out, each node's ``exit`` is called in turn, and what
+    it puts into its ``output`` (e.g. a pending window) goes through the
+    rest of the line. If the generator is closed early, ``exit`` is called
+    on the nodes without passing anything on. Don't :func:`connect` the
+    nodes: their ``output`` is set here.
+    '''
+    stream = None
+    entered = []
+    for node in nodes:
+        if isinstance(node, Producer):
+            if stream is not None or source is not None:
+                raise ValueError('Only the first node can be a producer')
+            stream = _produce(node, entered)
+        elif isinstance(node, (Consumer, SynchronousConsumer)):
+            if stream is None:
+                if source is None:
+                    raise ValueError('No producer or source to pull from')
+                stream = iter(source)
+            stream = _consume(node, stream, entered)
+        else:
+            raise ValueError('{!r} can not be pulled'.format(node))
+    if stream is None:
+        stream = iter(source)
+    return _run(nodes, stream, entered)
+
+
+def _run(nodes, stream, entered):
+    '''
+    Enter the nodes and yield from the stream. The nodes of the stream
+    exit as it runs out, and are removed from ``entered``.
+    '''
+    try:
+        for node in nodes:
+            node.enter()
+            entered.append(node)
+        for item in stream:
+            yield item
+    finally:
+        for node in entered:
+            node.exit()
+
+
+def _exit(node, entered, collector):
+    '''
+    Exit a node whose input ran out, and return what it put on exit.
+    '''
+    entered.remove(node)
+    node.exit()
+    return collector.items
+
+
+def _produce(node, entered):
+    collector = node.output = _Collector()
+    while not node._stopping:
+        node.produce()
+        items, collector.items = collector.items, []
+        for item in items:
+            yield item
+    for item in _exit(node, entered, collector):
+        yield item
+
+
+def _consume(node, upstream, entered):
+    collector = node.output = _Collector()
+    batch_size = getattr(node, 'batch_size', None)
+    if batch_size:
+        batches = iter(lambda: list(itertools.islice(upstream, batch_size)), [])
+        consume, inputs = node.consume_batch, batches
+    else:
+        consume, inputs = node.consume, upstream
+    for msg in inputs:
+        consume(msg)
+        items, collector.items = collector.items, []
+        for item in items:
+            yield item
+    for item in _exit(node, entered, collector):
+        yield item
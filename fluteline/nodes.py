@@ -1,33 +1,53 @@
 import threading
 
 from . import queues
+from .queues import _Control
 
 
-class _TerminationMessage(object):
+class _TerminationMessage(_Control):
     '''
     Send an instance to a node input to stop it.
     '''
-    pass
+    __slots__ = ()
 
 
 class _Threaded(threading.Thread):
+    stats = None
+
     def __init__(self):
         super(_Threaded, self).__init__()
         self._stopping = False
+        self._wakeup = threading.Event()
 
     def run(self):
         self.enter()
+        loop = self._select_loop()
         try:
             while not self._stopping:
-                self._loop()
+                loop()
         finally:
             self.exit()
 
+    def _select_loop(self):
+        if self.stats is None:
+            return self._loop
+        return self._loop_instrumented
+
     def _loop(self):
         pass
 
+    def _loop_instrumented(self):
+        self._loop()
+
+    def _sleep(self, seconds):
+        '''
+        Sleep, waking up early if the node is stopped.
+        '''
+        self._wakeup.wait(seconds)
+
     def stop(self):
         self._stopping = True
+        self._wakeup.set()
 
 
 class Node(object):
@@ -50,6 +70,18 @@ class Node(object):
         '''
         pass
 
+    def join(self, timeout=None):
+        '''
+        Wait up to ``timeout`` seconds for the node to stop.
+        '''
+        pass
+
+    def is_alive(self):
+        '''
+        Return ``True`` if the node is still running.
+        '''
+        return False
+
     def enter(self):
         '''
         Override to prepare resources.
@@ -66,27 +98,124 @@ class Node(object):
 class Producer(_Threaded, Node):
     '''
     Inherit this class to create producers.
+
+    Set ``rate`` to call ``produce`` at most ``rate`` times per second, in
+    bursts of up to ``burst`` calls. Set ``high_water`` to back off, for
+    up to ``max_backoff`` seconds at a time, while the downstream input
+    queue holds more than ``high_water`` messages.
     '''
+    rate = None
+    burst = 1
+    high_water = None
+    max_backoff = 0.1
+
     def produce(self):
         '''
         Override to produce new messages.
         '''
         pass
 
+    def _select_loop(self):
+        loop = super(Producer, self)._select_loop()
+        if self.rate is None and self.high_water is None:
+            return loop
+        pace = self._pacer()
+
+        def paced_loop():
+            pace()
+            if not self._stopping:
+                loop()
+
+        return paced_loop
+
+    def _pacer(self):
+        '''
+        Return a function that sleeps as needed before each ``produce``.
+        '''
+        state = {'tokens': float(self.burst), 'last': queues.monotonic()}
+
+        def wait_for_token():
+            now = queues.monotonic()
+            tokens = state['tokens'] + (now - state['last']) * self.rate
+            tokens = min(tokens, self.burst)
+            state['last'] = now
+            if tokens < 1:
+                self._sleep((1 - tokens) / self.rate)
+                state['last'] = queues.monotonic()
+                tokens = 1
+            state['tokens'] = tokens - 1
+
+        def wait_for_room():
+            delay = 0.001
+            while not self._stopping:
+                depth = _depth(getattr(self, 'output', None))
+                if depth is None or depth <= self.high_water:
+                    return
+                self._sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+        def pace():
+            if self.high_water is not None:
+                wait_for_room()
+            if self.rate is not None:
+                wait_for_token()
+
+        return pace
+
     def _loop(self):
         self.produce()
 
+    def _loop_instrumented(self):
+        start = queues.monotonic()
+        self.produce()
+        self.stats.busy_time += queues.monotonic() - start
+
+
+def _depth(output):
+    '''
+    Return the number of messages waiting downstream, or ``None`` if
+    unknown.
+    '''
+    outputs = getattr(output, 'outputs', None)
+    if outputs is not None:
+        depths = [_depth(o) for o in outputs]
+        depths = [d for d in depths if d is not None]
+        return max(depths) if depths else None
+    queue = getattr(output, 'input', output)
+    try:
+        return queue.qsize()
+    except (AttributeError, NotImplementedError):
+        return None
+
 
 class Consumer(_Threaded, Node):
     '''
     Inherit this class to create consumers or consumer-producers.
 
+    :param maxsize: Capacity of the input queue, ``0`` for unbounded.
+    :param overflow: Overflow policy of the input queue, see :class:`Queue`.
+
+    Set ``fusible = False`` to prevent :func:`connect` from fusing this
+    consumer with its neighbours (see :func:`fuse`).
+
+    Set ``batch_size`` to consume messages in batches with
+    :meth:`consume_batch`. Up to ``batch_size`` messages are collected,
+    waiting at most ``batch_timeout`` seconds after the first one arrives.
+
+    Messages sent with :meth:`put_control` are handled by :meth:`control`
+    before any queued data message.
+
     :var input: An input queue to accept messages.
     :vartype input: Queue
     '''
-    def __init__(self):
+    batch_size = None
+    batch_timeout = 0
+    queue_class = queues.Queue
+    fusible = True
+
+    def __init__(self, maxsize=0, overflow=queues.BLOCK):
         super(Consumer, self).__init__()
-        self.input = queues.Queue()
+        self.input = self.queue_class(maxsize, overflow)
 
     def consume(self, msg):
         '''
@@ -94,21 +223,124 @@ class Consumer(_Threaded, Node):
         '''
         pass
 
+    def consume_batch(self, msgs):
+        '''
+        Override to consume a list of messages at once. Only called when
+        ``batch_size`` is set. Calls ``consume`` for each message by default.
+        '''
+        for msg in msgs:
+            self.consume(msg)
+
+    def control(self, msg):
+        '''
+        Override to handle control messages, e.g. flushes or
+        reconfigurations.
+        '''
+        pass
+
     def put(self, msg):
         '''
         Send a message to this consumer.
         '''
         self.input.put(msg)
 
-    def stop(self):
-        self.put(_TerminationMessage())
+    def put_many(self, msgs):
+        '''
+        Send a list of messages to this consumer.
+        '''
+        self.input.put_many(msgs)
+
+    def put_control(self, msg):
+        '''
+        Send a control message to this consumer, to be handled by
+        :meth:`control` before the data messages already queued. Control
+        messages are never dropped.
+        '''
+        self.input.put_control(_Control(msg))
+
+    def stop(self, drain=True, timeout=None):
+        '''
+        Stop after the queued messages are consumed, or with
+        ``drain=False`` right after the current message.
+
+        If the input is full, wait up to ``timeout`` seconds for room
+        behind the queued messages, then stop right after the current
+        message instead.
+        '''
+        if drain and self.input._put_blocking(_TerminationMessage(), timeout):
+            return
+        self.input.put_control(_TerminationMessage())
 
     def _loop(self):
+        if self.batch_size:
+            self._loop_batch()
+            return
         msg = self.input.get()
+        if isinstance(msg, _Control):
+            self._control(msg)
+        else:
+            self.consume(msg)
+
+    def _loop_batch(self):
+        msgs = self.input.get_many(self.batch_size, self.batch_timeout)
+        msgs = self._until_termination(msgs)
+        if msgs:
+            self.consume_batch(msgs)
+
+    def _control(self, msg):
         if isinstance(msg, _TerminationMessage):
             self._stopping = True
         else:
-            self.consume(msg)
+            self.control(msg.msg)
+
+    def _loop_instrumented(self):
+        if self.batch_size:
+            self._loop_batch_instrumented()
+            return
+        stats = self.stats
+        start = queues.monotonic()
+        msg = self.input.get()
+        got = queues.monotonic()
+        stats.wait_time += got - start
+        if isinstance(msg, _Control):
+            self._control(msg)
+            return
+        stats.messages_in += 1
+        self.consume(msg)
+        stats.busy_time += queues.monotonic() - got
+
+    def _loop_batch_instrumented(self):
+        stats = self.stats
+        start = queues.monotonic()
+        msgs = self.input.get_many(self.batch_size, self.batch_timeout)
+        got = queues.monotonic()
+        stats.wait_time += got - start
+        msgs = self._until_termination(msgs)
+        if not msgs:
+            return
+        stats.messages_in += len(msgs)
+        self.consume_batch(msgs)
+        stats.busy_time += queues.monotonic() - got
+
+    def _until_termination(self, msgs):
+        '''
+        Handle the control messages in a list of messages and return the
+        data messages, cut at the first termination message, if any.
+        '''
+        for i, msg in enumerate(msgs):
+            if isinstance(msg, _Control):
+                break
+        else:
+            return msgs
+        data = msgs[:i]
+        for msg in msgs[i:]:
+            if not isinstance(msg, _Control):
+                data.append(msg)
+                continue
+            self._control(msg)
+            if self._stopping:
+                break
+        return data
 
 
 class SynchronousConsumer(Node):
@@ -129,5 +361,15 @@ class SynchronousConsumer(Node):
     def consume(self, msg):
         pass
 
+    def control(self, msg):
+        pass
+
     def put(self, msg):
         self.consume(msg)
+
+    def put_control(self, msg):
+        self.control(msg)
+
+    def put_many(self, msgs):
+        for msg in msgs:
+            self.consume(msg)
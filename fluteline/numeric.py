@@ -0,0 +1,137 @@
+import array
+
+from . import nodes
+from . import queues
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def as_frame(values, typecode='d'):
+    '''
+    Return a frame of ``values``: a NumPy array if NumPy is installed, an
+    ``array.array`` otherwise. ``typecode`` is an ``array`` typecode,
+    which NumPy understands too.
+    '''
+    if numpy is not None:
+        return numpy.array(values, dtype=typecode)
+    return array.array(typecode, values)
+
+
+def _is_ndarray(frame):
+    return numpy is not None and isinstance(frame, numpy.ndarray)
+
+
+class Chunk(nodes.Consumer):
+    '''
+    Collect scalar messages into frames of ``size`` values, or fewer if
+    ``timeout`` seconds pass after the first one, see :func:`as_frame`.
+    '''
+    def __init__(self, size, timeout=0.1, typecode='d', maxsize=0,
+                 overflow=queues.BLOCK):
+        super(Chunk, self).__init__(maxsize, overflow)
+        self.batch_size = size
+        self.batch_timeout = timeout
+        self.typecode = typecode
+
+    def consume_batch(self, msgs):
+        self.output.put(as_frame(msgs, self.typecode))
+
+
+class Unchunk(nodes.Consumer):
+    '''
+    Output the values of frames as scalar messages.
+    '''
+    def consume(self, frame):
+        self.output.put_many(frame.tolist())
+
+
+class MapFrames(nodes.Consumer):
+    '''
+    Output ``function(frame)`` for each frame.
+
+    ``function`` should work on whole NumPy arrays and on scalars alike,
+    e.g. ``lambda x: x * 2`` or ``numpy.sqrt``. It's called once per
+    NumPy frame, and once per value of ``array.array`` frames.
+    '''
+    def __init__(self, function, maxsize=0, overflow=queues.BLOCK):
+        super(MapFrames, self).__init__(maxsize, overflow)
+        self.function = function
+
+    def consume(self, frame):
+        if _is_ndarray(frame):
+            self.output.put(self.function(frame))
+        else:
+            function = self.function
+            self.output.put(
+                array.array(frame.typecode, [function(v) for v in frame]),
+            )
+
+
+class FilterFrames(nodes.Consumer):
+    '''
+    Output the values of each frame for which ``predicate`` is true,
+    skipping frames that end up empty.
+
+    Like with :class:`MapFrames`, ``predicate`` gets whole NumPy arrays
+    (and returns a boolean mask, e.g. ``lambda x: x > 0``) or single
+    values of ``array.array`` frames.
+    '''
+    def __init__(self, predicate, maxsize=0, overflow=queues.BLOCK):
+        super(FilterFrames, self).__init__(maxsize, overflow)
+        self.predicate = predicate
+
+    def consume(self, frame):
+        if _is_ndarray(frame):
+            frame = frame[self.predicate(frame)]
+        else:
+            predicate = self.predicate
+            frame = array.array(
+                frame.typecode, [v for v in frame if predicate(v)],
+            )
+        if len(frame):
+            self.output.put(frame)
+
+
+class ScanFrames(nodes.Consumer):
+    '''
+    Output the running accumulation of ``function`` over the values, one
+    frame per input frame, carrying on from the previous frames.
+
+    With a NumPy ufunc like ``numpy.maximum`` or ``numpy.add`` NumPy
+    frames are accumulated in one vectorized call; the ufunc must be
+    associative and commutative. Other binary functions, like ``max``,
+    are called value by value. Start from ``initial`` if given.
+    '''
+    def __init__(self, function, initial=None, maxsize=0,
+                 overflow=queues.BLOCK):
+        super(ScanFrames, self).__init__(maxsize, overflow)
+        self.function = function
+        self.initial = initial
+        self._carry = initial
+
+    def enter(self):
+        self._carry = self.initial
+
+    def consume(self, frame):
+        if not len(frame):
+            return
+        function = self.function
+        if _is_ndarray(frame) and hasattr(function, 'accumulate'):
+            result = function.accumulate(frame)
+            if self._carry is not None:
+                result = function(result, self._carry)
+        else:
+            values = []
+            carry = self._carry
+            for value in frame:
+                carry = value if carry is None else function(carry, value)
+                values.append(carry)
+            if _is_ndarray(frame):
+                result = numpy.array(values, dtype=frame.dtype)
+            else:
+                result = array.array(frame.typecode, values)
+        self._carry = result[-1]
+        self.output.put(result)
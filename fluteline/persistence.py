@@ -0,0 +1,384 @@
+import collections
+import mmap
+import os
+import struct
+import threading
+
+from . import queues
+from . import serialization
+
+_ACK = struct.Struct('<QQ')  # Segment index and offset
+
+
+class PersistentQueue(object):
+    '''
+    A queue that survives restarts, for the input of a single consumer.
+
+    Items are encoded with ``codec`` (a :class:`PickleCodec` by default) and
+    appended to memory-mapped segment files of ``segment_size`` bytes in the
+    ``path`` directory. Items are acknowledged when the consumer gets the
+    next ones, after consuming them, or with :meth:`ack`. A queue reopened
+    on the same ``path`` resumes from the first unacknowledged item, so at
+    most the items being consumed during a crash are replayed. Fully
+    acknowledged segments are deleted.
+
+    Writes are flushed to disk every ``sync_every`` items and acks, or when
+    ``sync_interval`` seconds passed since the last flush, checked on each
+    put and get. Call :meth:`sync` to flush now and :meth:`close` when done.
+
+    Only the ``BLOCK``, ``DROP_NEWEST`` and ``RAISE`` overflow policies are
+    supported. Control items (e.g. the termination of the consumer) aren't
+    persisted. Only one process may use a ``path`` at a time.
+    '''
+    _replaceable = False
+
+    def __init__(self, path, maxsize=0, overflow=queues.BLOCK, codec=None,
+                 segment_size=16 * 2 ** 20, sync_every=1000,
+                 sync_interval=1.0):
+        if overflow not in queues.OVERFLOW_POLICIES:
+            raise ValueError('Unknown overflow policy {!r}'.format(overflow))
+        if overflow == queues.DROP_OLDEST:
+            raise ValueError('PersistentQueue can not drop queued messages')
+        self.path = path
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.codec = codec or serialization.PickleCodec()
+        self.segment_size = segment_size
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.dropped = 0
+        self.blocked_time = 0.0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._control = collections.deque()
+        self._markers = collections.deque()
+        self._maps = {}
+        self._head = 0  # Number of records read since opening
+        self._unsynced = 0
+        self._last_sync = queues.monotonic()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._recover()
+
+    def empty(self):
+        '''
+        Return ``True`` if the queue is empty, ``False`` otherwise
+        (not reliable!).
+        '''
+        return not self.qsize()
+
+    def qsize(self):
+        '''
+        Return the approximate number of items in the queue (not reliable!).
+        '''
+        return self._size + len(self._control) + len(self._markers)
+
+    def put(self, item):
+        '''
+        Append an item to the log, applying the overflow policy if the
+        queue is full.
+        '''
+        with self._not_full:
+            if self.maxsize and self._size >= self.maxsize:
+                if not self._make_room():
+                    return
+            self._append(item)
+            self._size += 1
+            self._not_empty.notify()
+            self._maybe_sync()
+
+    def put_many(self, items):
+        '''
+        Append a list of items to the log.
+        '''
+        for item in items:
+            self.put(item)
+
+    def get(self):
+        '''
+        Acknowledge the items gotten so far, then remove and return an item.
+        '''
+        return self.get_many(1)[0]
+
+    def get_many(self, max_items, timeout=0):
+        '''
+        Acknowledge the items gotten so far, then remove and return a list
+        of up to ``max_items`` items. See :meth:`Queue.get_many`.
+        '''
+        items = []
+        deadline = None
+        with self._not_empty:
+            self._ack()
+            while True:
+                items.extend(self._take(max_items - len(items)))
+                if len(items) >= max_items or (
+                    items and isinstance(items[-1], queues._Control)
+                ):
+                    break
+                if not items:
+                    self._not_empty.wait()
+                    continue
+                if deadline is None:
+                    deadline = queues.monotonic() + timeout
+                remaining = deadline - queues.monotonic()
+                if remaining <= 0:
+                    break
+                self._not_empty.wait(remaining)
+            self._not_full.notify(len(items))
+        return items
+
+    def ack(self):
+        '''
+        Acknowledge all the items gotten so far, so they aren't replayed
+        after a restart.
+        '''
+        with self._mutex:
+            self._ack()
+
+    def clear(self):
+        '''
+        Remove all the items from the queue and return their number. They
+        are counted as dropped, and acknowledged with the next get.
+        '''
+        with self._mutex:
+            count = self._size
+            for _ in range(count):
+                self._next_record()
+            self._not_full.notify_all()
+        self.dropped += count
+        return count
+
+    def put_control(self, item):
+        '''
+        Put an item ahead of all the data items, after any other control
+        items. Control items are kept in memory only.
+        '''
+        with self._mutex:
+            self._control.append(item)
+            self._not_empty.notify()
+
+    def sync(self):
+        '''
+        Flush the written items and the acks to disk.
+        '''
+        with self._mutex:
+            self._sync()
+
+    def close(self):
+        '''
+        Flush to disk and close the segment files.
+        '''
+        with self._mutex:
+            self._sync()
+            for m in self._maps.values():
+                m.close()
+            self._maps.clear()
+            self._ack_map.close()
+
+    def _put_blocking(self, item, timeout=None):
+        '''
+        Put a control item after the items already queued.
+        '''
+        with self._mutex:
+            self._markers.append((self._head + self._size, item))
+            self._not_empty.notify()
+        return True
+
+    def _recover(self):
+        '''
+        Open the log, delete the acknowledged segments and find where to
+        read and write.
+        '''
+        ack_path = os.path.join(self.path, 'ack')
+        if not os.path.exists(ack_path):
+            with open(ack_path, 'wb') as f:
+                f.write(_ACK.pack(0, 0))
+        with open(ack_path, 'r+b') as f:
+            self._ack_map = mmap.mmap(f.fileno(), _ACK.size)
+        self._acked = self._read = _ACK.unpack_from(self._ack_map)
+        segments = self._segments()
+        for index in segments:
+            if index < self._acked[0]:
+                os.remove(self._segment_path(index))
+        last = max(segments + [self._acked[0]])
+        # Walk the unacknowledged records to find the end of the log
+        self._size = 0
+        self._write = self._read
+        while True:
+            index, offset = self._write
+            end = self._record_end(index, offset)
+            if end is not None:
+                self._write = (index, end)
+                self._size += 1
+            elif index < last:
+                self._write = (index + 1, 0)
+            else:
+                break
+
+    def _segments(self):
+        return sorted(
+            int(name[:-len('.log')]) for name in os.listdir(self.path)
+            if name.endswith('.log')
+        )
+
+    def _segment_path(self, index):
+        return os.path.join(self.path, '{:020d}.log'.format(index))
+
+    def _map(self, index, size=0):
+        try:
+            return self._maps[index]
+        except KeyError:
+            pass
+        path = self._segment_path(index)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.truncate(max(self.segment_size, size))
+        with open(path, 'r+b') as f:
+            m = self._maps[index] = mmap.mmap(f.fileno(), 0)
+        return m
+
+    def _release(self, index):
+        m = self._maps.pop(index, None)
+        if m is not None:
+            m.close()
+        path = self._segment_path(index)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _record_end(self, index, offset):
+        '''
+        Return where the record at a position ends, or ``None`` if the
+        segment has no more records.
+        '''
+        m = self._map(index)
+        if _at_end(m, offset):
+            return None
+        # A write torn by a crash leaves an incomplete record, or garbage
+        # where a count is expected, both ending the log
+        count = serialization._COUNT.unpack_from(m, offset)[0]
+        if count > serialization._MAX_FRAMES:
+            return None
+        header_size = serialization._COUNT.size + 8 * count
+        if offset + header_size > len(m):
+            return None
+        frames, end = serialization._unframe(m, offset)
+        if frames is None:
+            return None
+        return end
+
+    def _append(self, item):
+        buffers = serialization.frame(self.codec.encode(item))
+        size = sum(serialization._nbytes(buf) for buf in buffers)
+        index, offset = self._write
+        m = self._map(index)
+        if offset + size > len(m):
+            index, offset = index + 1, 0
+            m = self._map(index, size)
+        header = buffers[0]
+        count_size = serialization._COUNT.size
+        end = offset + len(header)
+        m[offset + count_size:end] = header[count_size:]
+        for buf in buffers[1:]:
+            end = _copy(m, end, buf)
+        if end + count_size <= len(m):
+            # Terminate the log, hiding what a torn write may have left
+            m[end:end + count_size] = b'\0' * count_size
+        # The count goes last, so a crash mid-write leaves the record out
+        m[offset:offset + count_size] = header[:count_size]
+        self._write = (index, end)
+
+    def _next_record(self):
+        '''
+        Move the read position past the next record and return its frames.
+        '''
+        index, offset = self._read
+        m = self._map(index)
+        if _at_end(m, offset):
+            index, offset = index + 1, 0  # The writer moved on
+            m = self._map(index)
+        frames, end = serialization._unframe(m, offset)
+        self._read = (index, end)
+        self._size -= 1
+        self._head += 1
+        return frames
+
+    def _take(self, count):
+        items = []
+        while len(items) < count:
+            if self._control:
+                items.append(self._control.popleft())
+                break
+            elif self._markers and self._markers[0][0] <= self._head:
+                items.append(self._markers.popleft()[1])
+                break
+            elif self._size:
+                items.append(self.codec.decode(self._next_record()))
+            else:
+                break
+        return items
+
+    def _make_room(self):
+        '''
+        Apply the overflow policy on a full queue. Return ``False`` if the
+        new item should be dropped.
+        '''
+        if self.overflow == queues.RAISE:
+            raise queues.Full
+        if self.overflow == queues.DROP_NEWEST:
+            self.dropped += 1
+            return False
+        start = queues.monotonic()
+        while self._size >= self.maxsize:
+            self._not_full.wait()
+        self.blocked_time += queues.monotonic() - start
+        return True
+
+    def _ack(self):
+        if self._acked == self._read:
+            return
+        _ACK.pack_into(self._ack_map, 0, *self._read)
+        done = range(self._acked[0], self._read[0])
+        self._acked = self._read
+        if done:
+            self._sync()  # Persist the ack before deleting what it covers
+            for index in done:
+                self._release(index)
+        else:
+            self._maybe_sync()
+
+    def _maybe_sync(self):
+        self._unsynced += 1
+        if (
+            self._unsynced >= self.sync_every or
+            queues.monotonic() - self._last_sync >= self.sync_interval
+        ):
+            self._sync()
+
+    def _sync(self):
+        for m in self._maps.values():
+            m.flush()
+        self._ack_map.flush()
+        self._unsynced = 0
+        self._last_sync = queues.monotonic()
+
+
+def _copy(m, offset, buf):
+    '''
+    Copy a bytes-like object into a map at ``offset``, return where it ends.
+    '''
+    size = serialization._nbytes(buf)
+    try:
+        m[offset:offset + size] = memoryview(buf)
+    except IndexError:  # python 2 maps only take strings
+        m[offset:offset + size] = memoryview(buf).tobytes()
+    return offset + size
+
+
+def _at_end(m, offset):
+    '''
+    Return ``True`` if there's no record at ``offset`` of a segment, i.e.
+    it's too close to the end or zeroed.
+    '''
+    count = serialization._COUNT
+    return offset + count.size > len(m) or not count.unpack_from(m, offset)[0]
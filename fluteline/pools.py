@@ -0,0 +1,236 @@
+import itertools
+import threading
+
+from . import instrumentation
+from . import nodes
+from . import processes
+from . import queues
+from . import supervision
+
+
+class _Reorderer(object):
+    '''
+    Collect the outputs of sequenced messages and pass them on in order.
+    '''
+    def __init__(self):
+        self.output = None
+        self._lock = threading.Lock()
+        self._next = 0
+        self._pending = {}
+
+    def done(self, seq, items):
+        with self._lock:
+            self._pending[seq] = items
+            while self._next in self._pending:
+                for item in self._pending.pop(self._next):
+                    self.output.put(item)
+                self._next += 1
+
+
+class _Collector(object):
+    '''
+    Stand-in ``output`` of an ordered worker, buffering what it puts.
+    '''
+    def __init__(self):
+        self.items = []
+
+    def put(self, item):
+        self.items.append(item)
+
+    def put_many(self, items):
+        self.items.extend(items)
+
+
+class Pool(nodes.Node):
+    '''
+    Run ``size`` replicas of a consumer that share one input queue.
+
+    Each replica is created by calling ``factory`` (usually a
+    :class:`Consumer` subclass) and has its own ``enter`` and ``exit``.
+    The input queue is the one of the first replica, so pass
+    ``lambda: MyConsumer(maxsize=100)`` for a bounded pool.
+
+    With ``ordered=True``, outputs reach ``output`` in the order their
+    inputs were put into the pool. Ordered pools require thread consumers
+    that don't set ``batch_size`` and block on overflow (``BLOCK``).
+
+    Call :meth:`resize` to change the number of replicas while running,
+    or see :class:`Autoscaler`.
+
+    :var workers: The replicas, including removed ones until they stop.
+    '''
+    def __init__(self, factory, size, ordered=False):
+        self.factory = factory
+        self.workers = [factory() for _ in range(size)]
+        self.ordered = ordered
+        self._output = None
+        self._started = False
+        self._retiring = 0  # Stop requests queued by resize, not yet taken
+        self._supervisor = None  # Set by supervise
+        self._lock = threading.Lock()
+        if ordered:
+            if self.workers[0].input.overflow != queues.BLOCK:
+                # A message dropped or refused would leave a gap in the
+                # sequence, and the reorderer would wait for it forever
+                raise ValueError('Ordered pools must block on overflow')
+            for worker in self.workers:
+                if isinstance(worker, processes._Processed):
+                    raise ValueError('Ordered pools need thread consumers')
+                if worker.batch_size:
+                    raise ValueError('Ordered pools do not support batches')
+            self._seq = itertools.count()
+            self._reorderer = _Reorderer()
+            for worker in self.workers:
+                self._sequence(worker)
+        self.input = self.workers[0].input
+
+    @property
+    def input(self):
+        return self._input
+
+    @input.setter
+    def input(self, queue):
+        if isinstance(queue, queues.RingQueue):
+            raise ValueError('RingQueue supports a single consumer')
+        self._input = queue
+        for worker in self.workers:
+            worker.input = queue
+
+    @property
+    def output(self):
+        return self._output
+
+    @output.setter
+    def output(self, output):
+        self._output = output
+        if self.ordered:
+            self._reorderer.output = output
+        else:
+            for worker in self.workers:
+                worker.output = output
+
+    def start(self):
+        with self._lock:
+            self._started = True
+            for worker in self.workers:
+                worker.start()
+
+    def stop(self, drain=True, timeout=None):
+        if timeout is not None:
+            deadline = queues.monotonic() + timeout
+        with self._lock:
+            self._prune()
+            self._started = False  # Keep the stopped workers listed
+            for worker in self.workers:
+                if timeout is not None:
+                    timeout = max(0, deadline - queues.monotonic())
+                worker.stop(drain, timeout)
+
+    @property
+    def size(self):
+        '''
+        The number of replicas, not counting removed ones that are still
+        finishing their current message, or ones that crashed.
+        '''
+        with self._lock:
+            self._prune()
+            return len(self.workers) - self._retiring
+
+    def resize(self, size):
+        '''
+        Add or remove replicas to have ``size`` of them, at least one.
+
+        New replicas share the input queue and are started if the pool is
+        running, and are instrumented or supervised like the others if
+        :func:`instrument` or :func:`supervise` was called on the pool.
+        To remove replicas, stop requests are queued ahead of the
+        messages, and whichever replicas pick them up stop right after
+        their current message. This call doesn't wait for them. No message
+        is dropped. Replicas that crashed are removed first.
+        '''
+        if size < 1:
+            raise ValueError('A pool needs at least one worker')
+        with self._lock:
+            self._prune()
+            count = size - (len(self.workers) - self._retiring)
+            if count > 0:
+                self._add(count)
+            elif count < 0:
+                self._remove(-count)
+
+    def _prune(self):
+        '''
+        Forget the replicas that stopped since they were started.
+        '''
+        if not self._started:
+            return
+        for worker in list(self.workers):
+            if worker.is_alive():
+                continue
+            self.workers.remove(worker)
+            # Replicas that crashed didn't take a stop request
+            if worker._stopping and self._retiring:
+                self._retiring -= 1
+
+    def _add(self, count):
+        instrumented = any(worker.stats is not None for worker in self.workers)
+        for _ in range(count):
+            worker = self.factory()
+            worker.input = self.input
+            if self.ordered:
+                self._sequence(worker)
+            else:
+                worker.output = self._output
+            if instrumented:
+                instrumentation.instrument([worker])
+            if self._supervisor is not None:
+                supervision._supervise_worker(self._supervisor, worker)
+            self.workers.append(worker)
+            if self._started:
+                worker.start()
+
+    def _remove(self, count):
+        if not self._started:
+            del self.workers[-count:]
+            return
+        for _ in range(count):
+            self.input.put_control(nodes._TerminationMessage())
+        self._retiring += count
+
+    def join(self, timeout=None):
+        for worker in self.workers:
+            worker.join(timeout)
+
+    def is_alive(self):
+        return any(worker.is_alive() for worker in self.workers)
+
+    def put(self, msg):
+        '''
+        Send a message to the pool.
+        '''
+        if self.ordered:
+            msg = (next(self._seq), msg)
+        self.input.put(msg)
+
+    def put_many(self, msgs):
+        '''
+        Send a list of messages to the pool.
+        '''
+        if self.ordered:
+            msgs = [(next(self._seq), msg) for msg in msgs]
+        self.input.put_many(msgs)
+
+    def _sequence(self, worker):
+        consume = worker.consume
+        collector = _Collector()
+        worker.output = collector
+
+        def consume_in_order(envelope):
+            seq, msg = envelope
+            try:
+                consume(msg)
+            finally:
+                items, collector.items = collector.items, []
+                self._reorderer.done(seq, items)
+
+        worker.consume = consume_in_order
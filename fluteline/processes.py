@@ -0,0 +1,72 @@
+from . import nodes
+from . import queues
+
+
+class _Processed(object):
+    '''
+    Run a threaded node's lifecycle in a child process instead of a thread.
+
+    The stopping flag lives in a shared event so both the parent and the
+    child see it. On exit, the child waits up to ``flush_timeout`` seconds
+    for its output to be flushed.
+    '''
+    flush_timeout = 1.0
+
+    def __init__(self, *args, **kwargs):
+        self._stop_event = queues._mp.Event()
+        self._process = None
+        super(_Processed, self).__init__(*args, **kwargs)
+
+    @property
+    def _stopping(self):
+        return self._stop_event.is_set()
+
+    @_stopping.setter
+    def _stopping(self, value):
+        if value:
+            self._stop_event.set()
+        else:
+            self._stop_event.clear()
+
+    def _sleep(self, seconds):
+        self._stop_event.wait(seconds)
+
+    def start(self):
+        self._process = queues._mp.Process(target=self._run_in_child)
+        self._process.daemon = self.daemon
+        self._process.start()
+
+    def _run_in_child(self):
+        try:
+            self.run()
+        finally:
+            output = getattr(self, 'output', None)
+            output = getattr(output, 'input', output)
+            if isinstance(output, queues.ProcessQueue):
+                output._close(self.flush_timeout)
+
+    def join(self, timeout=None):
+        self._process.join(timeout)
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+
+class ProcessProducer(_Processed, nodes.Producer):
+    '''
+    Same as :class:`Producer`, but runs in its own process.
+
+    ``enter``, ``produce`` and ``exit`` are called in the child process.
+    The ``output`` must be process-safe, which :func:`connect` takes care of.
+    '''
+    pass
+
+
+class ProcessConsumer(_Processed, nodes.Consumer):
+    '''
+    Same as :class:`Consumer`, but runs in its own process.
+
+    ``enter``, ``consume`` and ``exit`` are called in the child process.
+    The input is a :class:`ProcessQueue`, so messages must be picklable.
+    '''
+    queue_class = queues.ProcessQueue
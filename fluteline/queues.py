@@ -1,15 +1,131 @@
+import collections
+import multiprocessing
+import threading
+import time
+
 try:
     import queue  # python 3
 except ImportError:
     import Queue as queue
 
+try:
+    monotonic = time.monotonic  # python 3
+except AttributeError:
+    monotonic = time.time
+
+
+#: Block the caller until there is room in the queue.
+BLOCK = 'block'
+#: Silently drop the item being put.
+DROP_NEWEST = 'drop_newest'
+#: Drop the oldest item in the queue to make room for the new one.
+DROP_OLDEST = 'drop_oldest'
+#: Raise :class:`Full`.
+RAISE = 'raise'
+
+OVERFLOW_POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST, RAISE)
+
+Full = queue.Full
+
+try:
+    _mp = multiprocessing.get_context('fork')
+except (AttributeError, ValueError):
+    _mp = multiprocessing  # python 2 or no fork support
+
+
+class _Control(object):
+    '''
+    A control message for a consumer, see :meth:`Consumer.put_control`.
+    Overflow policies and :meth:`Queue.clear` never drop them.
+    '''
+    __slots__ = ('msg',)
+
+    def __init__(self, msg=None):
+        self.msg = msg
+
+
+class _Lanes(queue.Queue):
+    '''
+    A ``queue.Queue`` with a control lane. Control items are kept at the
+    front of the deque, in the order they were put, so getting data items
+    costs one more check.
+    '''
+    def _init(self, maxsize):
+        queue.Queue._init(self, maxsize)
+        self.controls = 0
+
+    def _get(self):
+        if self.controls:
+            self.controls -= 1
+        return self.queue.popleft()
+
+    def put(self, item, block=True, timeout=None):
+        # Control items can take the size past maxsize, which the put of
+        # python 2 misses, as it waits for room while size == maxsize
+        with self.not_full:
+            if self.maxsize > 0:
+                if timeout is not None:
+                    deadline = monotonic() + timeout
+                while self._qsize() >= self.maxsize:
+                    remaining = None
+                    if timeout is not None:
+                        remaining = deadline - monotonic()
+                    if not block or (remaining is not None and remaining <= 0):
+                        raise queue.Full
+                    self.not_full.wait(remaining)
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _put_control(self, item):
+        # Insert after the pending control items (deques of python 2 have
+        # no insert)
+        self.queue.rotate(-self.controls)
+        self.queue.appendleft(item)
+        self.queue.rotate(self.controls)
+        self.controls += 1
+
+    def _drop_oldest(self):
+        for i in range(self.controls, len(self.queue)):
+            if not isinstance(self.queue[i], _Control):
+                del self.queue[i]
+                return True
+        return False
+
+    def _clear_data(self):
+        count = len(self.queue) - self.controls
+        data = [self.queue.pop() for _ in range(count)]
+        kept = [item for item in reversed(data) if isinstance(item, _Control)]
+        self.queue.extend(kept)
+        return len(data) - len(kept)
+
 
 class Queue(object):
     '''
     Thread-safe queue for nodes communication.
+
+    Items put with :meth:`put_control` skip ahead of the data items, see
+    :meth:`Consumer.put_control`.
+
+    :param maxsize: Maximal number of items in the queue. ``0`` (the
+        default) means unbounded.
+    :param overflow: What to do when putting into a full queue. One of
+        ``BLOCK`` (the default), ``DROP_NEWEST``, ``DROP_OLDEST`` or
+        ``RAISE``.
+
+    :var dropped: Number of items dropped because the queue was full.
+    :var blocked_time: Total seconds spent blocking on a full queue.
     '''
-    def __init__(self):
-        self._queue = queue.Queue()
+    _backend = _Lanes
+
+    def __init__(self, maxsize=0, overflow=BLOCK):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('Unknown overflow policy {!r}'.format(overflow))
+        self._queue = self._backend(maxsize)
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.blocked_time = 0.0
 
     def empty(self):
         '''
@@ -18,14 +134,559 @@ class Queue(object):
         '''
         return self._queue.empty()
 
+    def qsize(self):
+        '''
+        Return the approximate number of items in the queue (not reliable!).
+        '''
+        return self._queue.qsize()
+
     def put(self, item):
         '''
-        Put an item into the queue.
+        Put an item into the queue, applying the overflow policy if the
+        queue is full.
         '''
-        return self._queue.put(item)
+        try:
+            return self._queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow == RAISE:
+                raise
+        if self.overflow == BLOCK:
+            start = monotonic()
+            self._queue.put(item)
+            self.blocked_time += monotonic() - start
+        elif self.overflow == DROP_NEWEST:
+            self.dropped += 1
+        elif self.overflow == DROP_OLDEST:
+            self._drop_oldest(item)
+
+    def put_many(self, items):
+        '''
+        Put a list of items into the queue, acquiring the lock once if there
+        is enough room for all of them.
+        '''
+        q = self._queue
+        with q.not_full:
+            if not q.maxsize or q._qsize() + len(items) <= q.maxsize:
+                for item in items:
+                    q._put(item)
+                q.unfinished_tasks += len(items)
+                q.not_empty.notify(len(items))
+                return
+        for item in items:
+            Queue.put(self, item)
 
     def get(self):
         '''
         Remove and return an item from the queue.
         '''
         return self._queue.get()
+
+    def get_many(self, max_items, timeout=0):
+        '''
+        Remove and return a list of up to ``max_items`` items.
+
+        Block until at least one item is available, then keep collecting
+        items for up to ``timeout`` seconds or until ``max_items`` are
+        collected. A control item ends the list, so that a consumer never
+        takes what follows its termination, e.g. the terminations of the
+        other consumers of a :class:`Pool`.
+        '''
+        q = self._queue
+        items = []
+        with q.not_empty:
+            while not q._qsize():
+                q.not_empty.wait()
+            deadline = monotonic() + timeout
+            while True:
+                taken = 0
+                control = False
+                while q._qsize() and len(items) < max_items and not control:
+                    item = q._get()
+                    items.append(item)
+                    taken += 1
+                    control = isinstance(item, _Control)
+                if taken:
+                    q.not_full.notify(taken)
+                remaining = deadline - monotonic()
+                if control or len(items) >= max_items or remaining <= 0:
+                    return items
+                q.not_empty.wait(remaining)
+
+    def clear(self):
+        '''
+        Remove all the items from the queue and return their number. They
+        are counted as dropped.
+        '''
+        q = self._queue
+        with q.mutex:
+            count = q._clear_data()
+            q.not_full.notify_all()
+        self.dropped += count
+        return count
+
+    def put_control(self, item):
+        '''
+        Put an item ahead of all the data items, after any other control
+        items. Never blocks and ignores ``maxsize`` and the overflow policy.
+        '''
+        q = self._queue
+        with q.mutex:
+            q._put_control(item)
+            q.unfinished_tasks += 1
+            q.not_empty.notify()
+
+    def _put_blocking(self, item, timeout=None):
+        '''
+        Put an item ignoring the overflow policy. Used for control messages
+        that must never be dropped, but must wait for the data before them.
+        Return ``False`` if there was no room within ``timeout`` seconds.
+        '''
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            start = monotonic()
+            try:
+                self._queue.put(item, timeout=timeout)
+            except queue.Full:
+                return False
+            finally:
+                self.blocked_time += monotonic() - start
+            return True
+
+    def _drop_oldest(self, item):
+        '''
+        Put an item, dropping the oldest data item if the queue is full.
+        '''
+        q = self._queue
+        with q.mutex:
+            if q.maxsize and q._qsize() >= q.maxsize and q._drop_oldest():
+                self.dropped += 1
+            q._put(item)
+            q.unfinished_tasks += 1
+            q.not_empty.notify()
+
+
+class _PriorityLanes(_Lanes):
+    '''
+    A control lane and a deque per priority level. Items are put as
+    ``(priority, item)`` pairs.
+    '''
+    def _init(self, maxsize):
+        _Lanes._init(self, maxsize)
+        self.lanes = [collections.deque()]
+        self.size = 0
+
+    def _qsize(self):
+        return self.controls + self.size
+
+    def _put(self, entry):
+        priority, item = entry
+        self.lanes[priority].append(item)
+        self.size += 1
+
+    def _put_control(self, item):
+        self.queue.append(item)
+        self.controls += 1
+
+    def _get(self):
+        if self.controls:
+            self.controls -= 1
+            return self.queue.popleft()
+        self.size -= 1
+        for lane in reversed(self.lanes):
+            if lane:
+                return lane.popleft()
+
+    def _drop_oldest(self):
+        for lane in self.lanes:
+            for i, item in enumerate(lane):
+                if not isinstance(item, _Control):
+                    del lane[i]
+                    self.size -= 1
+                    return True
+        return False
+
+    def _clear_data(self):
+        count = 0
+        for lane in self.lanes:
+            kept = [item for item in lane if isinstance(item, _Control)]
+            count += len(lane) - len(kept)
+            lane.clear()
+            lane.extend(kept)
+        self.size -= count
+        return count
+
+
+class PriorityQueue(Queue):
+    '''
+    A :class:`Queue` with ``levels`` priority levels, ``0`` to
+    ``levels - 1``. Items of higher priority are served first, in the
+    order they were put within each level. ``DROP_OLDEST`` drops the oldest
+    item of the lowest priority.
+
+    Set it as a consumer's ``queue_class`` and put with
+    ``consumer.input.put(msg, priority)``.
+    '''
+    _backend = _PriorityLanes
+
+    def __init__(self, maxsize=0, overflow=BLOCK, levels=2):
+        super(PriorityQueue, self).__init__(maxsize, overflow)
+        self._queue.lanes = [collections.deque() for _ in range(levels)]
+        self.levels = levels
+
+    def put(self, item, priority=0):
+        '''
+        Put an item with the given priority, applying the overflow policy
+        if the queue is full.
+        '''
+        if not 0 <= priority < self.levels:
+            raise ValueError('Unknown priority {!r}'.format(priority))
+        return super(PriorityQueue, self).put((priority, item))
+
+    def put_many(self, items, priority=0):
+        '''
+        Put a list of items with the given priority.
+        '''
+        if not 0 <= priority < self.levels:
+            raise ValueError('Unknown priority {!r}'.format(priority))
+        super(PriorityQueue, self).put_many([(priority, i) for i in items])
+
+    def _put_blocking(self, item, timeout=None):
+        return super(PriorityQueue, self)._put_blocking((0, item), timeout)
+
+
+class _Frames(list):
+    '''
+    An item encoded by a codec, as opposed to control messages that are put
+    as they are.
+    '''
+    pass
+
+
+class ProcessQueue(Queue):
+    '''
+    Process-safe queue for nodes communication across processes.
+
+    Same API as :class:`Queue`, backed by a ``multiprocessing.Queue`` (a
+    pipe), so items must be picklable. ``dropped`` and ``blocked_time`` are
+    counted in the process that puts the items. There is no control lane:
+    :meth:`put_control` puts items after the queued data.
+
+    :param codec: Optional :class:`Codec` to serialize items with, instead
+        of pickling them as they are.
+    '''
+    _backend = staticmethod(_mp.Queue)
+
+    def __init__(self, maxsize=0, overflow=BLOCK, codec=None):
+        super(ProcessQueue, self).__init__(maxsize, overflow)
+        self.codec = codec
+
+    def put(self, item):
+        '''
+        Put an item into the queue, applying the overflow policy if the
+        queue is full.
+        '''
+        if self.codec is not None:
+            item = _Frames(
+                f if isinstance(f, bytes) else bytes(f)
+                for f in self.codec.encode(item)
+            )
+        return super(ProcessQueue, self).put(item)
+
+    def put_many(self, items):
+        '''
+        Put a list of items into the queue.
+        '''
+        for item in items:
+            self.put(item)
+
+    def get(self):
+        '''
+        Remove and return an item from the queue.
+        '''
+        return self._decode(self._queue.get())
+
+    def get_many(self, max_items, timeout=0):
+        '''
+        Remove and return a list of up to ``max_items`` items. See
+        :meth:`Queue.get_many`.
+        '''
+        items = [self._queue.get()]
+        deadline = monotonic() + timeout
+        while len(items) < max_items and not isinstance(items[-1], _Control):
+            remaining = deadline - monotonic()
+            try:
+                if remaining > 0:
+                    items.append(self._queue.get(timeout=remaining))
+                else:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if self.codec is not None:
+            items = [self._decode(item) for item in items]
+        return items
+
+    def clear(self):
+        '''
+        Remove all the items from the queue and return their number. They
+        are counted as dropped.
+        '''
+        count = 0
+        controls = []
+        try:
+            while True:
+                item = self._queue.get_nowait()
+                if isinstance(item, _Control):
+                    controls.append(item)
+                else:
+                    count += 1
+        except queue.Empty:
+            pass
+        for item in controls:
+            self._put_blocking(item)
+        self.dropped += count
+        return count
+
+    def put_control(self, item):
+        '''
+        Put an item ignoring ``maxsize`` and the overflow policy.
+        '''
+        self._put_blocking(item)
+
+    def _drop_oldest(self, item):
+        controls = collections.deque()  # Put back, they are never dropped
+        while True:
+            try:
+                old = self._queue.get_nowait()
+                if isinstance(old, _Control):
+                    controls.append(old)
+                else:
+                    self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                while controls:
+                    self._queue.put_nowait(controls[0])
+                    controls.popleft()
+                return self._queue.put_nowait(item)
+            except queue.Full:
+                pass
+
+    def _decode(self, item):
+        if isinstance(item, _Frames):
+            return self.codec.decode(item)
+        return item
+
+    def _close(self, timeout):
+        '''
+        Wait up to ``timeout`` seconds for items buffered by this process to
+        be flushed into the pipe, then let the process exit without waiting
+        for the rest (in case nobody reads them anymore).
+        '''
+        self._queue.close()
+        feeder = getattr(self._queue, '_thread', None)
+        if feeder is not None:
+            feeder.join(timeout)
+        self._queue.cancel_join_thread()
+
+
+class RingQueue(object):
+    '''
+    Single-producer/single-consumer queue for nodes communication.
+
+    Same API as :class:`Queue`, but built on a ``collections.deque`` whose
+    ``append`` and ``popleft`` are atomic, so the fast path takes no lock.
+    The consumer only pays for an event when it waits on an empty queue,
+    and so does the producer when it blocks on a full one.
+
+    Use it for linear links with a single upstream node, which is what
+    :func:`connect` builds. ``maxsize`` is only exact with a single producer.
+    '''
+    def __init__(self, maxsize=0, overflow=BLOCK):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('Unknown overflow policy {!r}'.format(overflow))
+        self._ring = collections.deque()
+        self._control = collections.deque()
+        self._not_empty = threading.Event()
+        self._not_full = threading.Event()
+        self._getter_waiting = False
+        self._putter_waiting = False
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.blocked_time = 0.0
+
+    def empty(self):
+        '''
+        Return ``True`` if the queue is empty, ``False`` otherwise
+        (not reliable!).
+        '''
+        return not self._ring and not self._control
+
+    def qsize(self):
+        '''
+        Return the approximate number of items in the queue (not reliable!).
+        '''
+        return len(self._ring) + len(self._control)
+
+    def put(self, item):
+        '''
+        Put an item into the queue, applying the overflow policy if the
+        queue is full.
+        '''
+        if self.maxsize and len(self._ring) >= self.maxsize:
+            if not self._make_room():
+                return
+        self._ring.append(item)
+        if self._getter_waiting:
+            self._notify_getter()
+
+    def put_many(self, items):
+        '''
+        Put a list of items into the queue.
+        '''
+        if self.maxsize and len(self._ring) + len(items) > self.maxsize:
+            for item in items:
+                self.put(item)
+            return
+        self._ring.extend(items)
+        if self._getter_waiting:
+            self._notify_getter()
+
+    def get(self):
+        '''
+        Remove and return an item from the queue.
+        '''
+        if self._control:
+            return self._control.popleft()
+        while True:
+            try:
+                item = self._ring.popleft()
+                break
+            except IndexError:
+                if self._control:
+                    return self._control.popleft()
+                self._wait_not_empty()
+        if self._putter_waiting:
+            self._not_full.set()
+        return item
+
+    def get_many(self, max_items, timeout=0):
+        '''
+        Remove and return a list of up to ``max_items`` items. See
+        :meth:`Queue.get_many`.
+        '''
+        items = [self.get()]
+        deadline = monotonic() + timeout
+        ring = self._ring
+        control = self._control
+        while not isinstance(items[-1], _Control):
+            if control:
+                items.append(control.popleft())
+                break
+            while ring and len(items) < max_items:
+                item = ring.popleft()
+                items.append(item)
+                if isinstance(item, _Control):
+                    break
+            if self._putter_waiting:
+                self._not_full.set()
+            remaining = deadline - monotonic()
+            if len(items) >= max_items or remaining <= 0 or (
+                isinstance(items[-1], _Control)
+            ):
+                return items
+            self._wait_not_empty(remaining)
+        if self._putter_waiting:
+            self._not_full.set()
+        return items
+
+    def clear(self):
+        '''
+        Remove all the items from the queue and return their number. They
+        are counted as dropped.
+        '''
+        count = 0
+        controls = []
+        try:
+            while True:
+                item = self._ring.popleft()
+                if isinstance(item, _Control):
+                    controls.append(item)
+                else:
+                    count += 1
+        except IndexError:
+            pass
+        self._ring.extendleft(reversed(controls))
+        if self._putter_waiting:
+            self._not_full.set()
+        self.dropped += count
+        return count
+
+    def put_control(self, item):
+        '''
+        Put an item ahead of all the data items, after any other control
+        items. Never blocks and ignores ``maxsize`` and the overflow policy.
+        '''
+        self._control.append(item)
+        if self._getter_waiting:
+            self._notify_getter()
+
+    def _put_blocking(self, item, timeout=None):
+        '''
+        Put an item ignoring ``maxsize`` and the overflow policy. Used for
+        control messages that must never be dropped, but must wait for the
+        data before them. Never blocks.
+        '''
+        self._ring.append(item)
+        if self._getter_waiting:
+            self._notify_getter()
+        return True
+
+    def _make_room(self):
+        '''
+        Apply the overflow policy on a full queue. Return ``False`` if the
+        new item should be dropped.
+        '''
+        if self.overflow == RAISE:
+            raise Full
+        if self.overflow == DROP_NEWEST:
+            self.dropped += 1
+            return False
+        if self.overflow == DROP_OLDEST:
+            controls = []
+            try:
+                while True:
+                    item = self._ring.popleft()
+                    if not isinstance(item, _Control):
+                        self.dropped += 1
+                        break
+                    controls.append(item)
+            except IndexError:
+                pass
+            self._ring.extendleft(reversed(controls))
+            return True
+        start = monotonic()
+        while len(self._ring) >= self.maxsize:
+            self._not_full.clear()
+            self._putter_waiting = True
+            try:
+                if len(self._ring) >= self.maxsize:
+                    self._not_full.wait()
+            finally:
+                self._putter_waiting = False
+        self.blocked_time += monotonic() - start
+        return True
+
+    def _notify_getter(self):
+        self._not_empty.set()
+
+    def _wait_not_empty(self, timeout=None):
+        self._not_empty.clear()
+        self._getter_waiting = True
+        try:
+            if not self._ring and not self._control:
+                self._not_empty.wait(timeout)
+        finally:
+            self._getter_waiting = False
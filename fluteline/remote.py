@@ -0,0 +1,234 @@
+import logging
+import os
+import socket
+import struct
+
+from . import events
+from . import nodes
+from . import queues
+from . import serialization
+
+logger = logging.getLogger(__name__)
+
+_CREDIT = struct.Struct('<I')
+
+
+def _connect(address, timeout):
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+        except socket.error:
+            sock.close()
+            raise
+        return sock
+    sock = socket.create_connection(address, timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def _listen(address):
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(address)
+    sock.listen(1)
+    return sock
+
+
+class RemoteSink(nodes.Consumer):
+    '''
+    A consumer that streams its messages to a :class:`RemoteSource` over
+    TCP (``address`` is a ``(host, port)`` tuple) or a Unix socket
+    (``address`` is a path).
+
+    Messages are encoded with ``codec``, the same as the source's, and
+    sent in batches of up to ``batch_size``. The sink only sends as many
+    messages as the source granted it credits for, so when the source's
+    downstream is slow the sink blocks and its input queue fills up, like
+    any other consumer's.
+
+    Connecting and sending time out after ``timeout`` seconds. Once
+    stopped, the sink waits at most as long for credits, then drops the
+    messages it couldn't send.
+
+    If the connection breaks the sink reconnects, waiting from
+    ``reconnect_delay`` up to ``max_reconnect_delay`` seconds between
+    attempts. Messages in flight when the connection breaks may be lost,
+    and the chunk being sent may be delivered twice.
+    '''
+    batch_size = 64
+    fusible = False
+    reconnect_delay = 0.1
+    max_reconnect_delay = 5.0
+    timeout = 5.0
+
+    def __init__(self, address, codec, maxsize=0, overflow=queues.BLOCK):
+        super(RemoteSink, self).__init__(maxsize, overflow)
+        self.address = address
+        self.codec = codec
+        self._sock = None
+        self._credits = 0
+        self._credit_buffer = b''
+
+    def consume_batch(self, msgs):
+        payloads = [
+            b''.join(
+                bytes(buf)
+                for buf in serialization.frame(self.codec.encode(msg))
+            )
+            for msg in msgs
+        ]
+        sent = 0
+        while sent < len(payloads):
+            try:
+                if self._sock is None:
+                    self._connect()
+                while not self._credits:
+                    self._receive_credits()
+                count = min(self._credits, len(payloads) - sent)
+                self._sock.sendall(b''.join(payloads[sent:sent + count]))
+                self._credits -= count
+                sent += count
+            except socket.error as e:
+                self._disconnect()
+                if self._wakeup.is_set():
+                    logger.warning(
+                        'Dropping %d messages to %s: %s',
+                        len(payloads) - sent, self.address, e,
+                    )
+                    return
+
+    def stop(self, drain=True, timeout=None):
+        super(RemoteSink, self).stop(drain, timeout)
+        self._wakeup.set()  # Give up reconnecting
+
+    def exit(self):
+        self._disconnect()
+
+    def _connect(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                self._sock = _connect(self.address, self.timeout)
+                return
+            except socket.error as e:
+                if self._wakeup.is_set():
+                    raise
+                logger.info(
+                    'Connecting to %s failed (%s), retrying in %.1fs',
+                    self.address, e, delay,
+                )
+                self._sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = None
+        self._credits = 0
+        self._credit_buffer = b''
+
+    def _receive_credits(self):
+        try:
+            data = self._sock.recv(4096)
+        except socket.timeout:
+            if self._wakeup.is_set():
+                raise
+            return  # The source's downstream is slow, keep waiting
+        if not data:
+            raise socket.error('Connection closed by the source')
+        data = self._credit_buffer + data
+        whole = len(data) - len(data) % _CREDIT.size
+        for offset in range(0, whole, _CREDIT.size):
+            self._credits += _CREDIT.unpack_from(data, offset)[0]
+        self._credit_buffer = data[whole:]
+
+
+class RemoteSource(events.SelectorProducer):
+    '''
+    A producer that outputs the messages sent by a :class:`RemoteSink`.
+
+    Listens on ``address`` as soon as it's created; use the ``address``
+    member to find the port when binding to port 0. Accepts one sink at a
+    time, a new connection replacing the previous one, and grants it
+    ``window`` messages in flight. More credits are granted only after
+    messages are put into ``output``, so backpressure crosses the wire.
+
+    Messages are decoded with ``codec``, the same as the sink's. Anyone
+    who can connect to ``address`` can send messages, and unpickling
+    runs arbitrary code, so only use a :class:`PickleCodec` on a Unix
+    socket or a trusted network.
+    '''
+    window = 1024
+
+    def __init__(self, address, codec):
+        super(RemoteSource, self).__init__()
+        self.codec = codec
+        self._listener = _listen(address)
+        self.address = self._listener.getsockname()
+        self._conn = None
+        self._reader = None
+        self._ungranted = 0
+
+    def sources(self):
+        return [self._listener]
+
+    def produce(self, source):
+        if source is self._listener:
+            self._accept()
+        elif source is self._conn:
+            self._receive()
+
+    def exit(self):
+        self._close_connection()
+        self._listener.close()
+        if isinstance(self.address, str):
+            os.unlink(self.address)
+
+    def _accept(self):
+        conn, _ = self._listener.accept()
+        self._close_connection()
+        if conn.family != getattr(socket, 'AF_UNIX', None):
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._conn = conn
+        self._reader = serialization.FrameReader()
+        self._ungranted = 0
+        self.register(conn)
+        self._grant(self.window)
+
+    def _receive(self):
+        try:
+            data = self._conn.recv(65536)
+        except socket.error:
+            data = b''
+        if not data:
+            self._close_connection()
+            return
+        try:
+            messages = self._reader.feed(data)
+        except ValueError as e:
+            logger.warning('Closing the connection from a sink: %s', e)
+            self._close_connection()
+            return
+        for frames in messages:
+            self.output.put(self.codec.decode(frames))
+            self._ungranted += 1
+        if self._ungranted >= max(1, self.window // 2):
+            self._grant(self._ungranted)
+            self._ungranted = 0
+
+    def _grant(self, credits):
+        try:
+            self._conn.sendall(_CREDIT.pack(credits))
+        except socket.error:
+            self._close_connection()
+
+    def _close_connection(self):
+        if self._conn is not None:
+            self.unregister(self._conn)
+            self._conn.close()
+        self._conn = None
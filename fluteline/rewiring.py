@@ -0,0 +1,186 @@
+import inspect
+
+from . import fusion
+from . import instrumentation
+from . import pools
+from . import queues
+from . import tracing
+from . import utils
+from .nodes import _Control
+
+
+def insert_node(nodes, index, node):
+    '''
+    Start ``node`` and insert it into a running line of ``nodes`` before
+    ``nodes[index]``, or at the end if ``index == len(nodes)``.
+
+    Messages already queued downstream are not affected, and there's no
+    pause: the upstream node simply starts sending to ``node``.
+    '''
+    _check(node)
+    if index > 0:
+        _check_upstream(nodes[index - 1])
+    if index < len(nodes):
+        node.output = nodes[index]
+    else:
+        node.output = _target(nodes[-1].output)
+    node.start()
+    if index > 0:
+        _redirect(nodes[index - 1], node)
+    nodes.insert(index, node)
+
+
+def remove_node(nodes, index, timeout=None):
+    '''
+    Remove ``nodes[index]`` from a running line and stop it. Return it.
+
+    The upstream node sends straight to the downstream one right away,
+    while the removed node finishes its queued messages and passes them
+    on, so newer messages may overtake them. Nothing is dropped.
+
+    Wait up to ``timeout`` seconds for the removed node to finish, or
+    without a limit if ``timeout`` is ``None``. The node keeps passing on
+    its queued messages after that.
+
+    Ordered pools can't be removed, their queue holds sequenced messages.
+    '''
+    old = nodes[index]
+    _check(old)
+    _check_unordered(old)
+    if index > 0:
+        _check_upstream(nodes[index - 1])
+    downstream = _target(old.output)
+    if index > 0:
+        _redirect(nodes[index - 1], downstream)
+    queue = getattr(old, 'input', None)
+    if queue is not None:
+        # An upstream node may still hold the removed node, or its queue,
+        # from before the redirection: forward what it puts from now on
+        for target in (old, queue):
+            target.put = downstream.put
+            target.put_many = downstream.put_many
+    old.stop()
+    old.join(timeout)
+    if queue is not None and not old.is_alive():
+        # Pass on the messages that raced the termination
+        while not queue.empty():
+            msg = queue.get()
+            if not isinstance(msg, _Control):
+                downstream.put(msg)
+    del nodes[index]
+    return old
+
+
+def replace_node(nodes, index, node, timeout=None):
+    '''
+    Replace ``nodes[index]`` of a running line with ``node``, which must
+    not be started yet. Return the old node, stopped.
+
+    The old node stops after its current message, and ``node`` takes over
+    its input queue, so the queued messages are consumed by ``node`` in
+    order, without being dropped or consumed twice. The pause lasts as
+    long as the old node's current message.
+
+    If the old node is still busy after ``timeout`` seconds, raise
+    ``RuntimeError`` and leave ``node`` unstarted. The old node stops
+    when it's done, leaving its queue without a consumer.
+
+    Queued control messages are handed off too. Thread, async and pool
+    nodes can be rewired, but not process, fused or traced nodes, and
+    ordered pools can't hand off or take over a queue.
+    '''
+    old = nodes[index]
+    _check(old)
+    _check(node)
+    if index > 0:
+        _check_upstream(nodes[index - 1])
+    queue = getattr(old, 'input', None)
+    if queue is not None:
+        _check_unordered(old)
+        _check_handoff(queue, node)
+    node.output = _target(old.output)
+    if queue is not None:
+        old.stop(drain=False)
+    else:
+        old.stop()
+    old.join(timeout)
+    if old.is_alive():
+        raise RuntimeError('{!r} did not stop within {}s'.format(
+            old, timeout,
+        ))
+    if queue is not None:
+        node.input = queue
+    node.start()
+    if index > 0:
+        _redirect(nodes[index - 1], node)
+    nodes[index] = node
+    return old
+
+
+def _target(output):
+    '''
+    Return where an ``output`` leads, past the instrumentation wrapper.
+    '''
+    if isinstance(output, instrumentation._CountingOutput):
+        return output.wrapped
+    return output
+
+
+def _redirect(node, target):
+    '''
+    Point a node's ``output`` at ``target``, keeping it instrumented.
+    '''
+    if isinstance(node.output, instrumentation._CountingOutput):
+        node.output.wrapped = target
+    else:
+        node.output = target
+
+
+def _check(node):
+    _check_upstream(node)
+    if node.__dict__.get('stop') is fusion._noop:
+        raise ValueError('Fused nodes can not be rewired while running')
+
+
+def _check_upstream(node):
+    '''
+    Raise ``ValueError`` if ``node`` or its ``output`` can't be rewired.
+    '''
+    if utils._in_process(node):
+        raise ValueError('Process nodes can not be rewired while running')
+    if isinstance(getattr(node, 'output', None), tracing._TracingOutput):
+        # Untraced nodes would get the tracing envelopes
+        raise ValueError('Traced nodes can not be rewired while running')
+
+
+def _check_unordered(node):
+    if getattr(node, 'ordered', False):
+        # Their queue holds (sequence number, message) pairs
+        raise ValueError('Ordered pools can not hand off their queue')
+
+
+def _check_handoff(queue, node):
+    '''
+    Raise ``ValueError`` if ``node`` can't consume from ``queue``.
+    '''
+    own = getattr(node, 'input', None)
+    if own is None:
+        raise ValueError('{!r} has no input'.format(node))
+    _check_unordered(node)
+    if not getattr(own, '_replaceable', True) or (
+        not getattr(queue, '_replaceable', True)
+    ):
+        compatible = type(own) is type(queue)
+    else:
+        compatible = not _is_coroutine(queue.get)
+    if isinstance(node, pools.Pool) and isinstance(queue, queues.RingQueue):
+        compatible = False
+    if not compatible:
+        raise ValueError('{!r} can not consume from a {}'.format(
+            node, type(queue).__name__,
+        ))
+
+
+def _is_coroutine(function):
+    check = getattr(inspect, 'iscoroutinefunction', None)  # python 3.5+
+    return check is not None and check(function)
@@ -0,0 +1,144 @@
+import logging
+import math
+
+from . import instrumentation
+from . import queues
+from . import utils
+from .nodes import Producer
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolState(object):
+    '''
+    What an :class:`Autoscaler` remembers about a pool between checks.
+    '''
+    def __init__(self, now):
+        self.depth = 0
+        self.counters = {}  # id(worker) -> (messages_in, busy_time)
+        self.changed = now
+        self.calm_since = now
+
+
+class Autoscaler(Producer):
+    '''
+    Every ``interval`` seconds, resize each :class:`Pool` of ``pools``
+    between ``min_size`` and ``max_size`` workers, following its input
+    queue depth and processing rate.
+
+    A pool grows when more than ``high_water`` messages per worker are
+    queued, to as many workers as it takes to keep up with the incoming
+    messages and clear the backlog within ``cooldown`` seconds. It shrinks
+    by one worker once at most ``low_water`` messages per worker have been
+    queued for ``cooldown`` seconds, if the remaining workers would be busy
+    less than ``busy`` of the time. After a change, a pool is left alone
+    for ``cooldown`` seconds. The gap between the water marks and the
+    cooldown keep pools from flapping between sizes.
+
+    Thread pools are instrumented (see :func:`instrument`) to measure their
+    rate, so create the autoscaler after :func:`connect`. Pools of process
+    workers are scaled on queue depth alone, one worker at a time.
+
+    Decisions are logged, and put into ``output`` as dicts if it's set.
+    Stop the autoscaler before the pools.
+    '''
+    def __init__(self, pools, min_size=1, max_size=8, interval=1.0,
+                 high_water=10, low_water=1, busy=0.7, cooldown=5.0):
+        super(Autoscaler, self).__init__()
+        if not 1 <= min_size <= max_size:
+            raise ValueError('Expected 1 <= min_size <= max_size')
+        self.pools = pools
+        self.min_size = min_size
+        self.max_size = max_size
+        self.interval = interval
+        self.high_water = high_water
+        self.low_water = low_water
+        self.busy = busy
+        self.cooldown = cooldown
+        self.output = None
+        now = queues.monotonic()
+        self._last = now
+        self._states = [_PoolState(now) for _ in pools]
+        for pool in pools:
+            if not utils._in_process(pool):
+                instrumentation.instrument([pool])
+
+    def produce(self):
+        self._sleep(self.interval)
+        if self._stopping:
+            return
+        now = queues.monotonic()
+        elapsed, self._last = now - self._last, now
+        for pool, state in zip(self.pools, self._states):
+            self._check(pool, state, now, elapsed)
+
+    def _check(self, pool, state, now, elapsed):
+        size = pool.size
+        depth = pool.input.qsize()
+        processed, busy_time = self._measure(pool, state)
+        rate = processed / elapsed if processed is not None else None
+        utilization = None
+        if busy_time is not None and size:
+            utilization = busy_time / (elapsed * size)
+        if depth > self.low_water * size:
+            state.calm_since = now
+        target = size
+        if size < self.min_size or size > self.max_size:
+            target = min(max(size, self.min_size), self.max_size)
+        elif now - state.changed < self.cooldown:
+            pass
+        elif depth > self.high_water * size:
+            target = size + 1
+            if processed and busy_time:
+                capacity = processed / busy_time  # per worker, msgs/sec
+                arrivals = rate + (depth - state.depth) / elapsed
+                needed = (arrivals + depth / self.cooldown) / capacity
+                target = max(target, int(math.ceil(needed)))
+            target = min(target, self.max_size)
+        elif now - state.calm_since >= self.cooldown and size > self.min_size:
+            if utilization is None or (
+                utilization * size / (size - 1) < self.busy
+            ):
+                target = size - 1
+        state.depth = depth
+        if target == size:
+            return
+        pool.resize(target)
+        state.changed = state.calm_since = queues.monotonic()
+        decision = {
+            'name': type(pool.workers[0]).__name__,
+            'from': size,
+            'to': target,
+            'queue_depth': depth,
+            'rate': rate,
+            'utilization': utilization,
+        }
+        logger.info(
+            'Resized pool of %s from %d to %d workers (queue depth %d, '
+            '%s msgs/sec, %s busy)', decision['name'], size, target, depth,
+            'unknown' if rate is None else '{:.1f}'.format(rate),
+            'unknown' if utilization is None else '{:.0%}'.format(utilization),
+        )
+        if self.output is not None:
+            self.output.put(decision)
+
+    def _measure(self, pool, state):
+        '''
+        Return the messages consumed by the pool and its workers' busy
+        seconds since the last check, or ``None`` if unknown.
+        '''
+        if utils._in_process(pool) or any(
+            worker.stats is None for worker in pool.workers
+        ):
+            return None, None
+        processed = 0
+        busy_time = 0.0
+        counters = {}
+        for worker in pool.workers:
+            stats = worker.stats
+            last = state.counters.get(id(worker), (0, 0.0))
+            processed += stats.messages_in - last[0]
+            busy_time += stats.busy_time - last[1]
+            counters[id(worker)] = (stats.messages_in, stats.busy_time)
+        state.counters = counters
+        return processed, busy_time
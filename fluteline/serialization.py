@@ -0,0 +1,164 @@
+import pickle
+import struct
+
+
+class Codec(object):
+    '''
+    Turn messages into frames (a list of bytes-like objects) and back, for
+    edges that leave the process.
+    '''
+    def encode(self, msg):
+        '''
+        Override to return a list of bytes-like frames.
+        '''
+        raise NotImplementedError
+
+    def decode(self, frames):
+        '''
+        Override to return the message encoded in ``frames``.
+        '''
+        raise NotImplementedError
+
+
+class PickleCodec(Codec):
+    '''
+    Pickle messages. With protocol 5 (the default where available), large
+    buffers like ``bytearray`` or NumPy arrays become separate frames instead
+    of being copied into the pickle.
+    '''
+    def __init__(self, protocol=pickle.HIGHEST_PROTOCOL):
+        self.protocol = protocol
+
+    def encode(self, msg):
+        if self.protocol < 5:
+            return [pickle.dumps(msg, self.protocol)]
+        buffers = []
+        data = pickle.dumps(msg, self.protocol, buffer_callback=buffers.append)
+        return [data] + [buffer.raw() for buffer in buffers]
+
+    def decode(self, frames):
+        if len(frames) == 1:
+            return pickle.loads(frames[0])
+        return pickle.loads(frames[0], buffers=frames[1:])
+
+
+class StructCodec(Codec):
+    '''
+    Pack messages of a fixed schema with a ``struct`` format, e.g. ``'<qd'``
+    for an int and a float. Messages are tuples, or dicts when ``fields``
+    names the values.
+    '''
+    def __init__(self, fmt, fields=None):
+        self.struct = struct.Struct(fmt)
+        self.fields = fields
+
+    def encode(self, msg):
+        if self.fields is not None:
+            msg = [msg[field] for field in self.fields]
+        return [self.struct.pack(*msg)]
+
+    def decode(self, frames):
+        values = self.struct.unpack(frames[0])
+        if self.fields is not None:
+            return dict(zip(self.fields, values))
+        return values
+
+
+_COUNT = struct.Struct('<I')
+_MAX_FRAMES = 4096
+_CACHED = 16
+_headers = {}
+
+
+def _header(count):
+    '''
+    Return a ``struct.Struct`` for the lengths of ``count`` frames, cached
+    for the usual small counts. Raise ``ValueError`` for more than
+    ``_MAX_FRAMES``, as counts read from a stream can be anything.
+    '''
+    header = _headers.get(count)
+    if header is None:
+        if count > _MAX_FRAMES:
+            raise ValueError('{} frames in a message, the limit is {}'.format(
+                count, _MAX_FRAMES,
+            ))
+        header = struct.Struct('<I{}Q'.format(count))
+        if count < _CACHED:
+            _headers[count] = header
+    return header
+
+
+def _nbytes(buf):
+    '''
+    Return the size in bytes of a bytes-like object (memoryviews of python
+    2 have no ``nbytes``).
+    '''
+    view = memoryview(buf)
+    size = view.itemsize
+    for dim in view.shape:
+        size *= dim
+    return size
+
+
+def frame(frames):
+    '''
+    Return a list of buffers to write, prefixing ``frames`` with their
+    count and lengths. Frames are not copied.
+    '''
+    lengths = [_nbytes(f) for f in frames]
+    return [_header(len(lengths)).pack(len(lengths), *lengths)] + list(frames)
+
+
+class FrameReader(object):
+    '''
+    Reassemble framed messages from a stream of bytes, as written by
+    :func:`frame`.
+    '''
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        '''
+        Add received bytes and return a list of the complete messages, each
+        a list of frames. Raise ``ValueError`` if the stream is corrupt.
+        '''
+        self._buffer.extend(data)
+        messages = []
+        offset = 0
+        while True:
+            frames, end = self._read_one(offset)
+            if frames is None:
+                break
+            messages.append(frames)
+            offset = end
+        del self._buffer[:offset]
+        return messages
+
+    def _read_one(self, start):
+        '''
+        Return the frames of the message at ``start`` and where it ends, or
+        ``(None, start)`` if it isn't complete yet.
+        '''
+        return _unframe(self._buffer, start)
+
+
+def _unframe(buf, start):
+    '''
+    Return the frames of the message framed at ``start`` of ``buf`` and
+    where it ends, or ``(None, start)`` if it isn't complete.
+    '''
+    if len(buf) < start + _COUNT.size:
+        return None, start
+    count = _COUNT.unpack_from(buf, start)[0]
+    header = _header(count)
+    offset = start + header.size
+    if len(buf) < offset:
+        return None, start
+    lengths = header.unpack_from(buf, start)[1:]
+    if len(buf) < offset + sum(lengths):
+        return None, start
+    frames = []
+    for length in lengths:
+        frames.append(bytes(buf[offset:offset + length]))
+        offset += length
+    return frames, offset
@@ -0,0 +1,194 @@
+from multiprocessing import shared_memory
+
+from . import queues
+
+_pools = {}
+
+
+class SharedBuffer(object):
+    '''
+    A small, picklable handle to bytes in a :class:`SharedMemoryPool` slot.
+
+    Use as a context manager, or call ``release`` when done with it, so the
+    slot can be reused. Call ``retain`` before handing the same buffer to
+    another consumer.
+    '''
+    __slots__ = ('pool_name', 'slot', 'length')
+
+    def __init__(self, pool_name, slot, length):
+        self.pool_name = pool_name
+        self.slot = slot
+        self.length = length
+
+    def __getstate__(self):
+        return (self.pool_name, self.slot, self.length)
+
+    def __setstate__(self, state):
+        self.pool_name, self.slot, self.length = state
+
+    def __len__(self):
+        return self.length
+
+    def __enter__(self):
+        return self.view()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def view(self):
+        '''
+        Return a ``memoryview`` of the bytes, without copying. Don't use it
+        after releasing the buffer.
+        '''
+        pool = _pools[self.pool_name]
+        start = self.slot * pool.slot_size
+        return pool._shm.buf[start:start + self.length]
+
+    def tobytes(self):
+        '''
+        Return a copy of the bytes.
+        '''
+        view = self.view()
+        try:
+            return view.tobytes()
+        finally:
+            view.release()
+
+    def retain(self):
+        '''
+        Add a reference to the buffer.
+        '''
+        _pools[self.pool_name]._incref(self.slot, 1)
+
+    def release(self):
+        '''
+        Remove a reference to the buffer, freeing its slot if it was the
+        last one.
+        '''
+        _pools[self.pool_name]._incref(self.slot, -1)
+
+
+class SharedMemoryPool(object):
+    '''
+    Fixed size slots in one ``multiprocessing.shared_memory`` block, for
+    passing large buffers between processes without pickling them.
+
+    Create the pool before starting the process nodes that use it, so they
+    inherit it. ``share`` blocks while all the slots are in use.
+    '''
+    def __init__(self, slot_size, slots):
+        self.slot_size = slot_size
+        self.slots = slots
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=slot_size * slots,
+        )
+        self._refcounts = queues._mp.Array('i', slots)
+        self._free = queues._mp.Semaphore(slots)
+        _pools[self._shm.name] = self
+
+    def share(self, data):
+        '''
+        Copy a bytes-like object into a free slot and return a
+        :class:`SharedBuffer` holding one reference to it.
+        '''
+        data = memoryview(data).cast('B')
+        if data.nbytes > self.slot_size:
+            raise ValueError('{} bytes do not fit in a {} bytes slot'.format(
+                data.nbytes, self.slot_size,
+            ))
+        self._free.acquire()
+        with self._refcounts.get_lock():
+            slot = list(self._refcounts).index(0)
+            self._refcounts[slot] = 1
+        start = slot * self.slot_size
+        self._shm.buf[start:start + data.nbytes] = data
+        return SharedBuffer(self._shm.name, slot, data.nbytes)
+
+    def in_use(self):
+        '''
+        Return the number of slots in use.
+        '''
+        with self._refcounts.get_lock():
+            return sum(1 for count in self._refcounts if count)
+
+    def close(self):
+        '''
+        Free the shared memory. Call once, after all the nodes are stopped.
+        '''
+        del _pools[self._shm.name]
+        self._shm.close()
+        self._shm.unlink()
+
+    def _incref(self, slot, delta):
+        with self._refcounts.get_lock():
+            self._refcounts[slot] += delta
+            freed = not self._refcounts[slot]
+        if freed:
+            self._free.release()
+
+
+class SharedMemoryQueue(queues.ProcessQueue):
+    '''
+    A :class:`ProcessQueue` that moves bytes-like items of at least
+    ``min_size`` bytes through ``pool``, so only a :class:`SharedBuffer`
+    handle is pickled. Consumers receive the handles and must release them.
+
+    Only the ``BLOCK`` and ``RAISE`` overflow policies are supported.
+    '''
+    def __init__(self, pool, maxsize=0, overflow=queues.BLOCK, min_size=1024):
+        if overflow not in (queues.BLOCK, queues.RAISE):
+            raise ValueError('SharedMemoryQueue can not drop messages')
+        super(SharedMemoryQueue, self).__init__(maxsize, overflow)
+        self.pool = pool
+        self.min_size = min_size
+
+    def put(self, item):
+        '''
+        Put an item into the queue, through the pool if it's large enough.
+        '''
+        item = self._share(item)
+        try:
+            return super(SharedMemoryQueue, self).put(item)
+        except queues.Full:
+            if isinstance(item, SharedBuffer):
+                item.release()
+            raise
+
+    def put_many(self, items):
+        '''
+        Put a list of items into the queue.
+        '''
+        for item in items:
+            self.put(item)
+
+    def clear(self):
+        '''
+        Remove all the items from the queue, releasing the shared ones, and
+        return their number. Control items are kept.
+        '''
+        count = 0
+        controls = []
+        try:
+            while True:
+                item = self._queue.get_nowait()
+                if isinstance(item, queues._Control):
+                    controls.append(item)
+                    continue
+                if isinstance(item, SharedBuffer):
+                    item.release()
+                count += 1
+        except queues.queue.Empty:
+            pass
+        for item in controls:
+            self._put_blocking(item)
+        self.dropped += count
+        return count
+
+    def _share(self, item):
+        try:
+            view = memoryview(item)
+        except TypeError:
+            return item
+        if view.nbytes < self.min_size:
+            return item
+        return self.pool.share(view)
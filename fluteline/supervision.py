@@ -0,0 +1,184 @@
+import collections
+import logging
+import threading
+
+from . import queues
+from .nodes import Consumer, Producer, _Control
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetter(object):
+    '''
+    A message a supervised node failed on.
+
+    :var node: The ``repr`` of the node. Nodes can't be pickled, and dead
+        letters of process nodes are sent to the parent process.
+    :var msg: The message, a list of messages for ``consume_batch``.
+    :var error: The exception raised.
+    '''
+    __slots__ = ('node', 'msg', 'error')
+
+    def __init__(self, node, msg, error):
+        self.node = repr(node)
+        self.msg = msg
+        self.error = error
+
+
+class Supervisor(object):
+    '''
+    Restart policy of supervised nodes, see :func:`supervise`.
+
+    :var restarts: Number of restarts so far.
+    :var failed: Nodes that crashed too often and were given up on.
+    '''
+    def __init__(self, max_restarts=3, within=60.0, backoff=0.1,
+                 max_backoff=10.0, on_error=None, dead_letters=None):
+        self.max_restarts = max_restarts
+        self.within = within
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_error = on_error
+        self.dead_letters = dead_letters
+        self.restarts = 0
+        self.failed = []
+        self._lock = threading.Lock()
+        self._crashes = {}
+        self._shared_inputs = set()
+
+    def _restart(self, node, error, msg):
+        '''
+        Handle a crash in the node's thread. Restart the node and return
+        ``True``, or return ``False`` to give up on it.
+        '''
+        now = queues.monotonic()
+        with self._lock:
+            crashes = self._crashes.setdefault(id(node), collections.deque())
+            crashes.append(now)
+            while crashes[0] < now - self.within:
+                crashes.popleft()
+            count = len(crashes)
+        if msg is not None:
+            self._dead_letter(node, msg, error)
+        if self.on_error is not None:
+            self.on_error(node, error, msg)
+        name = type(node).__name__
+        if count > self.max_restarts:
+            logger.error(
+                '%s crashed %d times in %.0fs, giving up: %r',
+                name, count, self.within, error,
+            )
+            with self._lock:
+                self.failed.append(node)
+            self._divert(node, error)
+            return False
+        delay = min(self.backoff * 2 ** (count - 1), self.max_backoff)
+        logger.warning(
+            '%s crashed, restarting in %.2fs: %r', name, delay, error,
+        )
+        node.exit()
+        node._sleep(delay)
+        node.enter()
+        with self._lock:
+            self.restarts += 1
+        return True
+
+    def _divert(self, node, error):
+        '''
+        Send the queued and future messages of a consumer that was given up
+        on to the dead letters, so its input doesn't grow forever.
+        '''
+        if not isinstance(node, Consumer) or id(node) in self._shared_inputs:
+            return
+
+        def put(msg):
+            self._dead_letter(node, msg, error)
+
+        def put_many(msgs):
+            for msg in msgs:
+                put(msg)
+
+        node.put = put
+        node.put_many = put_many
+        while not node.input.empty():
+            msg = node.input.get()
+            if not isinstance(msg, _Control):
+                put(msg)
+
+    def _dead_letter(self, node, msg, error):
+        if self.dead_letters is not None:
+            self.dead_letters.put(DeadLetter(node, msg, error))
+
+
+def supervise(nodes, max_restarts=3, within=60.0, backoff=0.1,
+              max_backoff=10.0, on_error=None, dead_letters=None):
+    '''
+    Restart threaded nodes whose ``consume`` or ``produce`` raises, one
+    node at a time, leaving the rest of the line running. Call after
+    :func:`connect` and :func:`fuse`, and before :func:`start`.
+
+    A crashed node's ``exit`` is called, then its ``enter`` after a delay
+    of ``backoff`` seconds, doubling with each crash up to
+    ``max_backoff``, and it carries on with the next message. A node that
+    crashes more than ``max_restarts`` times within ``within`` seconds is
+    given up on: its thread dies with the exception, and messages put into
+    it are diverted to ``dead_letters``.
+
+    ``on_error(node, error, msg)`` is called on each crash, ``msg`` being
+    ``None`` for producers. If ``dead_letters`` is given (e.g. a
+    :class:`Queue`), failed messages are put into it as
+    :class:`DeadLetter` instances. Process nodes are supervised in their
+    own process, so use a :class:`ProcessQueue` for the dead letters.
+
+    Return the :class:`Supervisor`.
+    '''
+    supervisor = Supervisor(
+        max_restarts, within, backoff, max_backoff, on_error, dead_letters,
+    )
+    for node in nodes:
+        _supervise(supervisor, node)
+    return supervisor
+
+
+def _supervise(supervisor, node):
+    workers = getattr(node, 'workers', None)
+    if workers is not None:
+        node._supervisor = supervisor  # For the replicas added by resize
+        for worker in workers:
+            _supervise_worker(supervisor, worker)
+    elif isinstance(node, Producer):
+        node.produce = _guard(supervisor, node, node.produce)
+    elif isinstance(node, Consumer):
+        consume = node.consume
+        node.consume = _guard(supervisor, node, consume)
+        if node.__dict__.get('put') == consume:
+            node.put = node.consume  # Fused consumer, see fusion.fuse
+        consume_batch = node.consume_batch
+        if _function(consume_batch) is not _function(Consumer.consume_batch):
+            node.consume_batch = _guard(supervisor, node, consume_batch)
+            if node.__dict__.get('put_many') == consume_batch:
+                node.put_many = node.consume_batch
+
+
+def _supervise_worker(supervisor, worker):
+    '''
+    Supervise a replica of a :class:`Pool`, which shares its input.
+    '''
+    supervisor._shared_inputs.add(id(worker))
+    _supervise(supervisor, worker)
+
+
+def _guard(supervisor, node, method):
+    def guarded(*args):
+        try:
+            return method(*args)
+        except Exception as error:
+            msg = args[0] if args else None
+            if not supervisor._restart(node, error, msg):
+                raise
+
+    return guarded
+
+
+def _function(method):
+    return getattr(method, '__func__', method)
@@ -0,0 +1,230 @@
+import math
+
+from . import processes
+from . import queues
+from .nodes import Consumer, Producer, SynchronousConsumer
+
+_LOG_BASE = math.log(1.1)  # Histogram buckets are 10% wide
+
+
+class Histogram(object):
+    '''
+    Latencies in logarithmic buckets, with about 10% precision.
+    '''
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets = {}
+
+    def add(self, seconds):
+        '''
+        Record a latency.
+        '''
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = None
+        if seconds > 0:
+            # Round down, not towards zero, below 1 second too
+            bucket = int(math.floor(math.log(seconds) / _LOG_BASE))
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    def percentile(self, p):
+        '''
+        Return the latency below which ``p`` percent of the latencies fall,
+        or ``None`` if there are none.
+        '''
+        if not self.count:
+            return None
+        rank = self.count * p / 100.0
+        seen = 0
+        buckets = sorted(self._buckets.items(), key=_bucket_order)
+        for bucket, count in buckets:
+            seen += count
+            if seen >= rank:
+                break
+        if bucket is None:
+            return 0.0
+        return min(math.exp((bucket + 1) * _LOG_BASE), self.max)
+
+    def snapshot(self):
+        '''
+        Return a dict with the count, mean, max, p50, p90 and p99.
+        '''
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+def _bucket_order(item):
+    bucket = item[0]
+    return (bucket is not None, bucket)
+
+
+class _Envelope(object):
+    '''
+    A traced message, with the time it was created at the source and the
+    time it left the previous node.
+    '''
+    __slots__ = ('msg', 'origin', 'stamp')
+
+    def __init__(self, msg, origin, stamp):
+        self.msg = msg
+        self.origin = origin
+        self.stamp = stamp
+
+
+class _TracingOutput(object):
+    '''
+    Wrap a traced node's ``output`` to stamp, forward or unwrap envelopes.
+    '''
+    def __init__(self, output, node, histogram, tracer, source, last):
+        self.wrapped = output
+        self._node = node
+        self._histogram = histogram
+        self._tracer = tracer
+        self._source = source
+        self._last = last
+        self._count = 0
+
+    def put(self, msg):
+        envelope = self._node._envelope
+        now = queues.monotonic()
+        if envelope is not None:
+            self._histogram.add(now - envelope.stamp)
+            origin = envelope.origin
+        elif self._source:
+            self._count += 1
+            if self._count % self._tracer.sample:
+                return self.wrapped.put(msg)
+            origin = now
+        else:
+            return self.wrapped.put(msg)
+        if self._last:
+            self._tracer.end_to_end.add(now - origin)
+            self.wrapped.put(msg)
+        else:
+            self.wrapped.put(_Envelope(msg, origin, now))
+
+    def put_many(self, msgs):
+        for msg in msgs:
+            self.put(msg)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+class Tracer(object):
+    '''
+    Latency histograms of traced nodes, see :func:`trace`.
+
+    :var stages: ``(node, histogram)`` pairs of the time from the previous
+        node's output to this node's output, in order.
+    :var end_to_end: Histogram of the time from the source to the last
+        traced node's output.
+    '''
+    def __init__(self, sample):
+        self.sample = sample
+        self.stages = []
+        self.end_to_end = Histogram()
+
+    def report(self):
+        '''
+        Return a dict with a snapshot of each stage and of the end to end
+        latencies.
+        '''
+        return {
+            'stages': [
+                dict(name=type(node).__name__, **histogram.snapshot())
+                for node, histogram in self.stages
+            ],
+            'end_to_end': self.end_to_end.snapshot(),
+        }
+
+
+def _traceable(node):
+    return (
+        isinstance(node, (Producer, Consumer, SynchronousConsumer)) and
+        not isinstance(node, processes._Processed)
+    )
+
+
+def trace(nodes, sample=1):
+    '''
+    Trace the latency of 1 in ``sample`` messages through connected nodes.
+    Call after :func:`connect` and before :func:`start`.
+
+    Traces start at producers and at the first node, and end at the last
+    traced node, or where they reach a node that can't be traced (pools,
+    process and async nodes). Consumers never see the tracing envelopes.
+
+    Return a :class:`Tracer` with the latency histograms.
+    '''
+    tracer = Tracer(sample)
+    traced = [node for node in nodes if _traceable(node)]
+    traced_ids = set(id(node) for node in traced)
+
+    def is_traced(output):
+        outputs = getattr(output, 'outputs', None)
+        if outputs is not None:
+            return all(is_traced(o) for o in outputs)
+        return id(output) in traced_ids
+
+    for node in traced:
+        histogram = Histogram()
+        tracer.stages.append((node, histogram))
+        node._envelope = None
+        source = node is nodes[0] or isinstance(node, Producer)
+        last = not is_traced(node.output)
+        node.output = _TracingOutput(
+            node.output, node, histogram, tracer, source, last,
+        )
+        if not isinstance(node, Producer):
+            _unwrap_input(node)
+    return tracer
+
+
+def _unwrap_input(node):
+    '''
+    Make the node's consume methods take envelopes off the messages.
+    '''
+    consume = node.consume
+
+    def traced_consume(msg):
+        if isinstance(msg, _Envelope):
+            node._envelope = msg
+            msg = msg.msg
+        else:
+            node._envelope = None
+        consume(msg)
+
+    if node.__dict__.get('put') == consume:
+        node.put = traced_consume  # Fused consumer, see fusion.fuse
+    node.consume = traced_consume
+
+    consume_batch = getattr(node, 'consume_batch', None)
+    if consume_batch is not None and (
+        _function(consume_batch) is not _function(Consumer.consume_batch)
+    ):
+        def traced_consume_batch(msgs):
+            envelopes = [msg for msg in msgs if isinstance(msg, _Envelope)]
+            node._envelope = envelopes[0] if envelopes else None
+            consume_batch([
+                msg.msg if isinstance(msg, _Envelope) else msg
+                for msg in msgs
+            ])
+
+        if node.__dict__.get('put_many') == consume_batch:
+            node.put_many = traced_consume_batch
+        node.consume_batch = traced_consume_batch
+
+
+def _function(method):
+    return getattr(method, '__func__', method)
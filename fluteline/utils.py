@@ -1,18 +1,59 @@
+from . import fusion
 from . import nodes
+from . import pools
+from . import processes
 from . import queues
 
 
-def connect(nodes):
+def connect(nodes, queue_class=None, fuse=False):
     '''
     Connect a list of nodes.
 
     Connected nodes have an ``output`` member which is the following node in
     the line. The last node's ``output`` is a :class:`Queue` for
     easy plumbing.
+
+    ``queue_class`` selects the queue implementation of each connection,
+    e.g. :class:`RingQueue`. Pass a single class to use it everywhere, or a
+    list of ``len(nodes) + 1`` classes (or ``None`` to keep the default),
+    where entry ``i`` is the input queue of ``nodes[i]`` and the last entry
+    is the final output queue. Must be called before the nodes are started.
+
+    Connections from or to a process node (e.g. :class:`ProcessConsumer`)
+    always use a :class:`ProcessQueue`.
+
+    With ``fuse=True``, adjacent consumers are fused to run in one thread
+    and the fusion plan is returned, see :func:`fuse`.
     '''
+    if not isinstance(queue_class, (list, tuple)):
+        queue_class = [queue_class] * (len(nodes) + 1)
     for a, b in zip(nodes[:-1], nodes[1:]):
         a.output = b
-    b.output = queues.Queue()
+    after_process = False
+    for node, cls in zip(nodes, queue_class):
+        in_process = _in_process(node)
+        if isinstance(node, pools.Pool) and cls is queues.RingQueue:
+            cls = None  # Pools have many consumers
+        if in_process or after_process:
+            cls = queues.ProcessQueue
+        if cls is not None and hasattr(node, 'input'):
+            if not getattr(node.input, '_replaceable', True):
+                pass  # e.g. the input of async nodes
+            elif not isinstance(node.input, cls):
+                node.input = cls(node.input.maxsize, node.input.overflow)
+        after_process = in_process
+    if after_process:
+        nodes[-1].output = queues.ProcessQueue()
+    else:
+        nodes[-1].output = (queue_class[-1] or queues.Queue)()
+    if fuse:
+        return fusion.fuse(nodes)
+
+
+def _in_process(node):
+    if isinstance(node, pools.Pool):
+        return any(_in_process(worker) for worker in node.workers)
+    return isinstance(node, processes._Processed)
 
 
 def start(nodes):
@@ -23,9 +64,38 @@ def start(nodes):
         node.start()
 
 
-def stop(nodes):
+def stop(nodes, timeout=None, drain=True):
     '''
     Stop multiple nodes.
+
+    With ``drain=True`` consumers process their queued messages before
+    stopping. With ``drain=False`` queued messages are discarded and the
+    termination skips ahead of messages put meanwhile, so the nodes stop
+    right after their current message.
+
+    If ``timeout`` is given, wait up to ``timeout`` seconds in total for all
+    the nodes to stop, and return a list of the nodes that are still alive
+    (e.g. a producer blocked inside ``produce``). Consumers whose input is
+    still full at the deadline get the termination ahead of their queued
+    messages.
     '''
+    if timeout is not None:
+        deadline = queues.monotonic() + timeout
     for node in nodes:
-        node.stop()
+        if not drain and hasattr(node, 'input'):
+            node.input.clear()
+            node.stop(drain=False)
+        elif timeout is not None and hasattr(node, 'input'):
+            # Don't wait for room in a full input past the deadline
+            node.stop(timeout=max(0, deadline - queues.monotonic()))
+        else:
+            node.stop()
+    if timeout is None:
+        return
+    for node in reversed(nodes):
+        if node.is_alive():
+            node.join(max(0, deadline - queues.monotonic()))
+        if not drain and hasattr(node, 'input') and not node.is_alive():
+            # Release upstream nodes blocked on a full input queue
+            node.input.clear()
+    return [node for node in nodes if node.is_alive()]
@@ -0,0 +1,269 @@
+import array
+import collections
+import math
+
+from . import nodes
+from . import queues
+
+_BASIC = ('count', 'sum', 'mean', 'min', 'max')
+
+
+class _Sketch(object):
+    '''
+    Counts of values in logarithmic buckets, for percentiles with
+    ``accuracy`` relative error. Unlike most sketches, values can be
+    removed, so it can follow a sliding window.
+    '''
+    def __init__(self, accuracy=0.01):
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._counts = {}
+        self.count = 0
+
+    def add(self, value):
+        bucket = self._bucket(value)
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+
+    def remove(self, value):
+        bucket = self._bucket(value)
+        count = self._counts[bucket] - 1
+        if count:
+            self._counts[bucket] = count
+        else:
+            del self._counts[bucket]
+        self.count -= 1
+
+    def percentile(self, p):
+        '''
+        Return the value below which ``p`` percent of the values fall.
+        '''
+        rank = (self.count - 1) * p / 100.0
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen > rank:
+                break
+        sign, index = bucket
+        if not sign:
+            return 0.0
+        return sign * 2 * self._gamma ** (sign * index) / (self._gamma + 1)
+
+    def _bucket(self, value):
+        if not value:
+            return (0, 0)
+        index = int(math.ceil(math.log(abs(value)) / self._log_gamma))
+        if value > 0:
+            return (1, index)
+        return (-1, -index)  # Larger magnitudes sort first
+
+
+class _Window(nodes.Consumer):
+    '''
+    Keep the values of a window in arrays, indexed by sequence number, and
+    the requested aggregates up to date as values enter and leave it.
+    '''
+    def __init__(self, aggregates, key, typecode, accuracy, maxsize,
+                 overflow):
+        super(_Window, self).__init__(maxsize, overflow)
+        self.aggregates = tuple(aggregates)
+        self.key = key
+        self._percentiles = []
+        for name in self.aggregates:
+            if name in _BASIC:
+                continue
+            try:
+                if not name.startswith('p'):
+                    raise ValueError
+                self._percentiles.append((name, float(name[1:])))
+            except ValueError:
+                raise ValueError('Unknown aggregate {!r}'.format(name))
+        self._values = array.array(typecode)
+        self._base = 0  # Sequence number of the first value in the arrays
+        self._start = 0  # Sequence number of the first value in the window
+        self._sum = 0
+        self._min = collections.deque() if 'min' in self.aggregates else None
+        self._max = collections.deque() if 'max' in self.aggregates else None
+        self._sketch = _Sketch(accuracy) if self._percentiles else None
+
+    def _add(self, msg):
+        value = msg if self.key is None else self.key(msg)
+        seq = self._base + len(self._values)
+        self._values.append(value)
+        self._sum += value
+        values, base = self._values, self._base
+        if self._min is not None:
+            while self._min and values[self._min[-1] - base] >= value:
+                self._min.pop()
+            self._min.append(seq)
+        if self._max is not None:
+            while self._max and values[self._max[-1] - base] <= value:
+                self._max.pop()
+            self._max.append(seq)
+        if self._sketch is not None:
+            self._sketch.add(value)
+
+    def _evict(self, count):
+        '''
+        Remove the ``count`` oldest values from the window.
+        '''
+        values, base = self._values, self._base
+        for seq in range(self._start, self._start + count):
+            value = values[seq - base]
+            self._sum -= value
+            if self._sketch is not None:
+                self._sketch.remove(value)
+        self._start += count
+        for extremes in (self._min, self._max):
+            while extremes and extremes[0] < self._start:
+                extremes.popleft()
+        if self._start - base > len(values) // 2:
+            self._compact()
+
+    def _compact(self):
+        '''
+        Drop the evicted values from the arrays.
+        '''
+        del self._values[:self._start - self._base]
+        self._base = self._start
+        if self._values.typecode in 'fd':
+            # Re-sum now and then to bound floating point drift
+            self._sum = math.fsum(self._values)
+
+    def _count(self):
+        return self._base + len(self._values) - self._start
+
+    def _aggregate(self):
+        values, base = self._values, self._base
+        count = self._count()
+        result = {}
+        for name in self.aggregates:
+            if name == 'count':
+                result[name] = count
+            elif name == 'sum':
+                result[name] = self._sum
+            elif name == 'mean':
+                result[name] = self._sum / float(count)
+            elif name == 'min':
+                result[name] = values[self._min[0] - base]
+            elif name == 'max':
+                result[name] = values[self._max[0] - base]
+        for name, p in self._percentiles:
+            result[name] = self._sketch.percentile(p)
+        return result
+
+
+class CountWindow(_Window):
+    '''
+    Aggregate the last ``size`` messages every ``step`` messages, and
+    output a dict of the ``aggregates``. ``step`` defaults to ``size``,
+    i.e. tumbling windows.
+
+    :param aggregates: Names of aggregates to compute: ``'count'``,
+        ``'sum'``, ``'mean'``, ``'min'``, ``'max'``, or percentiles like
+        ``'p50'`` and ``'p99.9'``.
+    :param key: Optional function returning the number to aggregate from
+        each message.
+    :param typecode: The ``array`` typecode of the numbers, ``'d'``
+        (floats) by default.
+    :param accuracy: Relative error of the percentiles.
+
+    Each message is added and removed in amortized constant time: sums
+    are kept running, minimums and maximums in monotonic deques, and
+    percentiles in a sketch of logarithmic buckets that only gets sorted
+    for the output.
+    '''
+    def __init__(self, size, step=None, aggregates=_BASIC, key=None,
+                 typecode='d', accuracy=0.01, maxsize=0,
+                 overflow=queues.BLOCK):
+        super(CountWindow, self).__init__(
+            aggregates, key, typecode, accuracy, maxsize, overflow,
+        )
+        self.size = size
+        self.step = step or size
+        self._since_output = 0
+
+    def consume(self, msg):
+        self._add(msg)
+        if self._count() > self.size:
+            self._evict(1)
+        self._since_output += 1
+        if self._count() == self.size and self._since_output >= self.step:
+            self._since_output = 0
+            self.output.put(self._aggregate())
+
+
+class TimeWindow(_Window):
+    '''
+    Aggregate the messages of the last ``duration`` seconds every ``step``
+    seconds, and output a dict of the ``aggregates`` with the ``start`` and
+    ``end`` of the window. ``step`` defaults to ``duration``, i.e.
+    tumbling windows. Windows end at multiples of ``step``.
+
+    Messages are timed by their arrival, or by ``timestamp(msg)`` (e.g.
+    event times). They must come in time order, and a window is output when
+    the first message after its end arrives, or on ``exit`` when the node
+    stops. Empty windows are skipped.
+
+    See :class:`CountWindow` for the other parameters.
+    '''
+    def __init__(self, duration, step=None, aggregates=_BASIC, key=None,
+                 timestamp=None, typecode='d', accuracy=0.01, maxsize=0,
+                 overflow=queues.BLOCK):
+        super(TimeWindow, self).__init__(
+            aggregates, key, typecode, accuracy, maxsize, overflow,
+        )
+        self.duration = duration
+        self.step = step or duration
+        self.timestamp = timestamp or (lambda msg: queues.monotonic())
+        self._times = array.array('d')
+        self._end = None
+
+    def consume(self, msg):
+        now = self.timestamp(msg)
+        if self._end is None:
+            self._end = self._next_end(now)
+        while now >= self._end:
+            self._expire(self._end - self.duration)
+            if self._count():
+                self._output_window()
+            else:
+                self._end = self._next_end(now)
+        self._times.append(now)
+        self._add(msg)
+
+    def exit(self):
+        '''
+        Output the pending windows, as if time went on without messages.
+        '''
+        if self._end is None:
+            return
+        self._expire(self._end - self.duration)
+        while self._count():
+            self._output_window()
+            self._expire(self._end - self.duration)
+
+    def _output_window(self):
+        result = self._aggregate()
+        result['start'] = self._end - self.duration
+        result['end'] = self._end
+        self.output.put(result)
+        self._end += self.step
+
+    def _next_end(self, now):
+        return (math.floor(now / self.step) + 1) * self.step
+
+    def _expire(self, start):
+        '''
+        Evict the values timed before ``start``.
+        '''
+        times, offset = self._times, self._start - self._base
+        count = 0
+        while offset + count < len(times) and times[offset + count] < start:
+            count += 1
+        if count:
+            self._evict(count)
+
+    def _compact(self):
+        del self._times[:self._start - self._base]
+        super(TimeWindow, self)._compact()
@@ -0,0 +1,20 @@
+import asyncio
+
+import fluteline
+
+
+class AsyncProducer(fluteline.AsyncProducer):
+    async def produce(self):
+        await asyncio.sleep(0.001)
+        self.output.put(1)
+
+
+class AsyncConsumer(fluteline.AsyncConsumer):
+    async def consume(self, item):
+        await asyncio.sleep(0)
+        self.output.put(item * 2)
+
+
+class FailingConsumer(fluteline.AsyncConsumer):
+    async def consume(self, item):
+        raise ValueError(item)
@@ -1,3 +1,6 @@
+import threading
+import time
+
 import fluteline
 
 
@@ -24,3 +27,165 @@ class SynchronousConsumer(fluteline.SynchronousConsumer):
 
     def consume(self, item):
         self.output.put(item * 2)
+
+
+class BatchConsumer(fluteline.Consumer):
+    batch_size = 10
+    batch_timeout = 0.01
+
+    def enter(self):
+        self.batches = []
+
+    def consume_batch(self, items):
+        self.batches.append(items)
+        self.output.put_many([item * 2 for item in items])
+
+
+class ProcessProducer(fluteline.ProcessProducer):
+    def produce(self):
+        self.output.put(1)
+
+
+class ProcessConsumer(fluteline.ProcessConsumer):
+    def enter(self):
+        import os
+        self.pid = os.getpid()
+
+    def consume(self, item):
+        self.output.put((self.pid, item * 2))
+
+
+class SlowConsumer(fluteline.Consumer):
+    '''
+    Takes longer for smaller items, to shuffle the outputs of pools.
+    '''
+    def enter(self):
+        self.entered = True
+
+    def consume(self, item):
+        time.sleep(0.001 * (10 - item % 10))
+        self.output.put(item)
+
+
+class BlockedProducer(fluteline.Producer):
+    def produce(self):
+        time.sleep(0.5)
+
+
+class ThreadRecorder(fluteline.Consumer):
+    def enter(self):
+        self.entered_in = threading.current_thread()
+
+    def consume(self, item):
+        self.output.put((item, threading.current_thread()))
+
+
+class SharedBufferReader(fluteline.ProcessConsumer):
+    def consume(self, item):
+        with item as view:
+            self.output.put(bytes(view[:4]) + b':' + str(len(view)).encode())
+
+
+class PacedProducer(Producer):
+    rate = 100
+
+
+class SocketReader(fluteline.SelectorProducer):
+    def __init__(self, sock):
+        super(SocketReader, self).__init__()
+        self.sock = sock
+
+    def sources(self):
+        return [self.sock]
+
+    def produce(self, source):
+        self.output.put(source.recv(1024))
+
+
+class ControlledConsumer(fluteline.Consumer):
+    def consume(self, item):
+        self.output.put(item)
+
+    def control(self, msg):
+        self.output.put(('control', msg))
+
+
+class FlakyConsumer(fluteline.Consumer):
+    '''
+    Fails on negative items.
+    '''
+    def __init__(self):
+        super(FlakyConsumer, self).__init__()
+        self.enters = 0
+
+    def enter(self):
+        self.enters += 1
+
+    def consume(self, item):
+        if item < 0:
+            raise ValueError(item)
+        self.output.put(item)
+
+
+class FlakyProcessConsumer(fluteline.ProcessConsumer):
+    '''
+    Fails on negative items, in its own process.
+    '''
+    def consume(self, item):
+        if item < 0:
+            raise ValueError(item)
+        self.output.put(item)
+
+
+class FlakyProducer(fluteline.Producer):
+    def __init__(self):
+        super(FlakyProducer, self).__init__()
+        self.count = 0
+
+    def produce(self):
+        self.count += 1
+        if self.count == 2:
+            raise ValueError(self.count)
+        self.output.put(self.count)
+        self._sleep(0.01)
+
+
+class Tagger(fluteline.Consumer):
+    def __init__(self, tag):
+        super(Tagger, self).__init__()
+        self.tag = tag
+
+    def consume(self, item):
+        time.sleep(0.0001)
+        self.output.put((self.tag, item))
+
+
+class CountingProducer(fluteline.Producer):
+    '''
+    Produces the numbers up to ``count``, then stops.
+    '''
+    def __init__(self, count):
+        super(CountingProducer, self).__init__()
+        self.count = count
+        self.produced = 0
+
+    def produce(self):
+        self.output.put(self.produced)
+        self.produced += 1
+        if self.produced == self.count:
+            self.stop()
+
+
+class GatedConsumer(fluteline.Consumer):
+    '''
+    Waits for ``gate`` to be set before consuming its first item.
+    '''
+    def __init__(self):
+        super(GatedConsumer, self).__init__()
+        self.consuming = threading.Event()
+        self.gate = threading.Event()
+
+    def consume(self, item):
+        self.consuming.set()
+        self.gate.wait()
+        self.output.put(item)
@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+
+import fluteline
+from .basic_nodes import Producer, Consumer
+
+try:
+    from .async_nodes import AsyncProducer, AsyncConsumer, FailingConsumer
+except SyntaxError:  # python 2
+    AsyncProducer = AsyncConsumer = FailingConsumer = None
+
+
+@unittest.skipIf(AsyncConsumer is None, 'asyncio is not available')
+class TestAsyncNodes(unittest.TestCase):
+
+    def run_line(self, nodes):
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        try:
+            return nodes[-1].output.get()
+        finally:
+            fluteline.stop(nodes)
+            for node in nodes:
+                node.join(1)
+                self.assertFalse(node.is_alive())
+
+    def wait_for_log(self, logs):
+        # Done callbacks may run after join returns
+        deadline = time.time() + 1
+        while not logs.output and time.time() < deadline:
+            time.sleep(0.001)
+
+    def test_async_line(self):
+        nodes = [AsyncProducer(), AsyncConsumer(), AsyncConsumer()]
+        self.assertEqual(self.run_line(nodes), 4)
+
+    def test_threads_into_async(self):
+        nodes = [Producer(), AsyncConsumer(), Consumer()]
+        self.assertEqual(self.run_line(nodes), 4)
+
+    def test_async_into_threads(self):
+        nodes = [AsyncProducer(), Consumer(), AsyncConsumer()]
+        self.assertEqual(self.run_line(nodes), 4)
+
+    def test_connect_keeps_async_input(self):
+        nodes = [Producer(), AsyncConsumer()]
+        fluteline.connect(nodes, queue_class=fluteline.Queue)
+        self.assertIsInstance(nodes[1].input, fluteline.AsyncQueue)
+
+    def test_crash_is_logged(self):
+        consumer = FailingConsumer()
+        with self.assertLogs('fluteline.aio', 'ERROR') as logs:
+            consumer.start()
+            consumer.put(1)
+            consumer.join(1)
+            self.wait_for_log(logs)
+        self.assertFalse(consumer.is_alive())
+        self.assertIn('ValueError', logs.output[0])
+
+    def test_block_in_loop(self):
+        producer = AsyncProducer()
+        producer.output = AsyncConsumer(maxsize=1)  # Not started
+        with self.assertLogs('fluteline.aio', 'ERROR') as logs:
+            producer.start()
+            producer.join(1)
+            self.wait_for_log(logs)
+        self.assertIn('RuntimeError', logs.output[0])
+
+    def test_several_producers(self):
+        consumer = AsyncConsumer(maxsize=1)
+        consumer.output = fluteline.Queue()
+
+        def put():
+            for i in range(50):
+                consumer.put(i)
+
+        threads = [threading.Thread(target=put) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        consumer.start()
+        results = [consumer.output.get() for _ in range(200)]
+        for thread in threads:
+            thread.join(1)
+            self.assertFalse(thread.is_alive())
+        fluteline.stop([consumer])
+        consumer.join(1)
+        self.assertEqual(sorted(results), sorted(list(range(0, 100, 2)) * 4))
+
+    def test_join_not_started(self):
+        consumer = AsyncConsumer()
+        consumer.join(0.01)
+        self.assertFalse(consumer.is_alive())
@@ -0,0 +1,41 @@
+import unittest
+
+import fluteline
+from .basic_nodes import (
+    Producer, Consumer, BatchConsumer, SynchronousConsumer, ThreadRecorder,
+)
+
+
+class Unfusible(fluteline.Consumer):
+    fusible = False
+
+    def consume(self, item):
+        self.output.put(item)
+
+
+class TestFusion(unittest.TestCase):
+
+    def test_plan(self):
+        a, b, c = Consumer(), Consumer(), Consumer()
+        d, e, f = Unfusible(), Consumer(), BatchConsumer()
+        g, h = Consumer(), SynchronousConsumer()
+        nodes = [Producer(), a, b, c, d, e, f, g, h]
+        plan = fluteline.connect(nodes, fuse=True)
+        self.assertEqual(plan, [[a, b, c]])
+
+    def test_no_fusion_by_default(self):
+        nodes = [Consumer(), Consumer()]
+        self.assertIsNone(fluteline.connect(nodes))
+
+    def test_fused_run_in_one_thread(self):
+        head, recorder = Consumer(), ThreadRecorder()
+        nodes = [head, recorder]
+        fluteline.connect(nodes, fuse=True)
+        fluteline.start(nodes)
+        head.put(1)
+        item, thread = recorder.output.get()
+        self.assertEqual(fluteline.stop(nodes, timeout=1), [])
+        self.assertEqual(item, 2)
+        self.assertIs(thread, head)
+        self.assertIs(recorder.entered_in, head)
+        self.assertFalse(recorder.is_alive())
@@ -0,0 +1,81 @@
+import unittest
+
+import fluteline
+from .basic_nodes import Producer, Consumer
+
+
+class Identity(fluteline.Consumer):
+    def consume(self, item):
+        self.output.put(item)
+
+
+class TestRouters(unittest.TestCase):
+
+    def test_broadcast_shares_messages(self):
+        outputs = [fluteline.Queue(), fluteline.Queue()]
+        msg = {'key': 'value'}
+        fluteline.Broadcast(outputs).put(msg)
+        self.assertIs(outputs[0].get(), msg)
+        self.assertIs(outputs[1].get(), msg)
+
+    def test_round_robin(self):
+        outputs = [fluteline.Queue(), fluteline.Queue()]
+        fluteline.RoundRobin(outputs).put_many([0, 1, 2, 3])
+        self.assertEqual(outputs[0].get_many(10), [0, 2])
+        self.assertEqual(outputs[1].get_many(10), [1, 3])
+
+    def test_partition(self):
+        outputs = [fluteline.Queue(), fluteline.Queue()]
+        partition = fluteline.Partition(outputs, key=lambda msg: msg[0])
+        partition.put_many([(0, 'a'), (1, 'b'), (0, 'c')])
+        partition.put((1, 'd'))
+        self.assertEqual(outputs[0].get_many(10), [(0, 'a'), (0, 'c')])
+        self.assertEqual(outputs[1].get_many(10), [(1, 'b'), (1, 'd')])
+
+
+class TestGraph(unittest.TestCase):
+
+    def test_broadcast_and_merge(self):
+        source, left, right, sink = Identity(), Consumer(), Consumer(), Identity()
+        graph = fluteline.Graph()
+        graph.broadcast(source, [left, right])
+        graph.merge([left, right], sink)
+        graph.start()
+        source.put(1)
+        self.assertEqual([sink.output.get(), sink.output.get()], [2, 2])
+        self.assertEqual(graph.stop(timeout=1), [])
+
+    def test_leaves_get_output_queues(self):
+        producer, a, b = Producer(), Consumer(), Consumer()
+        graph = fluteline.Graph()
+        graph.round_robin(producer, [a, b])
+        self.assertIsInstance(a.output, fluteline.Queue)
+        self.assertIsInstance(b.output, fluteline.Queue)
+        graph.start()
+        self.assertEqual(a.output.get(), 2)
+        self.assertEqual(b.output.get(), 2)
+        self.assertEqual(graph.stop(timeout=1), [])
+
+    def test_order(self):
+        a, b, c, d = Identity(), Identity(), Identity(), Identity()
+        graph = fluteline.Graph()
+        graph.connect(c, d)
+        graph.partition(a, [b, c])
+        order = graph.order()
+        self.assertLess(order.index(a), order.index(c))
+        self.assertLess(order.index(c), order.index(d))
+
+    def test_cycle(self):
+        a, b = Identity(), Identity()
+        graph = fluteline.Graph()
+        graph.connect(a, b)
+        graph.connect(b, a)
+        with self.assertRaises(ValueError):
+            graph.order()
+
+    def test_connect_twice(self):
+        a, b, c = Identity(), Identity(), Identity()
+        graph = fluteline.Graph()
+        graph.connect(a, b)
+        with self.assertRaises(ValueError):
+            graph.connect(a, c)
@@ -0,0 +1,79 @@
+import logging
+import unittest
+
+import fluteline
+from .basic_nodes import Producer, Consumer, BatchConsumer
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_disabled_by_default(self):
+        nodes = [Producer(), Consumer()]
+        fluteline.connect(nodes)
+        entries = fluteline.stats(nodes)
+        self.assertEqual(entries[1]['name'], 'Consumer')
+        self.assertIsNone(entries[1]['messages_in'])
+        self.assertEqual(entries[1]['queue_depth'], 0)
+
+    def test_counters(self):
+        consumer = Consumer()
+        batch_consumer = BatchConsumer()
+        nodes = [consumer, batch_consumer]
+        fluteline.connect(nodes)
+        fluteline.instrument(nodes)
+        consumer.put_many(list(range(20)))
+        fluteline.start(nodes)
+        results = [batch_consumer.output.get() for _ in range(20)]
+        fluteline.stop(nodes)
+        for node in nodes:
+            node.join(1)
+        self.assertEqual(results, [i * 4 for i in range(20)])
+        entries = fluteline.stats(nodes)
+        for entry in entries:
+            self.assertEqual(entry['messages_in'], 20)
+            self.assertEqual(entry['messages_out'], 20)
+            self.assertGreaterEqual(entry['busy_time'], 0)
+            self.assertGreaterEqual(entry['wait_time'], 0)
+
+    def test_pool(self):
+        pool = fluteline.Pool(Consumer, 3)
+        fluteline.connect([pool])
+        fluteline.instrument([pool])
+        pool.start()
+        pool.put_many(list(range(30)))
+        for _ in range(30):
+            pool.output.get()
+        pool.stop()
+        pool.join(1)
+        self.assertEqual(fluteline.stats([pool])[0]['messages_in'], 30)
+
+
+class TestReporter(unittest.TestCase):
+
+    def test_produces_snapshots(self):
+        consumer = Consumer()
+        reporter = fluteline.Reporter([consumer], interval=0.01)
+        reporter.output = fluteline.Queue()
+        reporter.start()
+        snapshot = reporter.output.get()
+        reporter.stop()
+        reporter.join(1)
+        self.assertFalse(reporter.is_alive())
+        self.assertEqual(snapshot[0]['name'], 'Consumer')
+
+    def test_logs_without_output(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('fluteline.instrumentation')
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        try:
+            reporter = fluteline.Reporter([Consumer()], interval=0.01)
+            reporter.start()
+            reporter.join(0.1)
+            reporter.stop()
+            reporter.join(1)
+        finally:
+            logger.removeHandler(handler)
+        self.assertTrue(records)
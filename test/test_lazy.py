@@ -0,0 +1,52 @@
+import threading
+import unittest
+
+import fluteline
+from .basic_nodes import (
+    BatchConsumer, Consumer, CountingProducer, SynchronousConsumer, Tagger,
+    ThreadRecorder,
+)
+
+
+class TestPull(unittest.TestCase):
+
+    def test_producer_and_consumers(self):
+        nodes = [CountingProducer(5), Consumer(), SynchronousConsumer()]
+        self.assertEqual(list(fluteline.pull(nodes)), [0, 4, 8, 12, 16])
+        self.assertIsNone(nodes[2].resource)  # exit was called
+
+    def test_lazy(self):
+        producer = CountingProducer(1000)
+        outputs = fluteline.pull([producer, Consumer()])
+        self.assertEqual(next(outputs), 0)
+        self.assertEqual(next(outputs), 2)
+        self.assertEqual(producer.produced, 2)
+        outputs.close()
+
+    def test_source_and_batches(self):
+        nodes = [BatchConsumer()]
+        outputs = fluteline.pull(nodes, source=range(25))
+        self.assertEqual(list(outputs), [i * 2 for i in range(25)])
+        self.assertEqual(
+            [len(batch) for batch in nodes[0].batches], [10, 10, 5],
+        )
+
+    def test_output_on_exit(self):
+        window = fluteline.TimeWindow(10, timestamp=lambda msg: msg)
+        outputs = list(fluteline.pull([window, Tagger('t')], source=range(5)))
+        self.assertEqual(len(outputs), 1)
+        tag, aggregates = outputs[0]
+        self.assertEqual(tag, 't')
+        self.assertEqual(aggregates['count'], 5)
+
+    def test_calling_thread(self):
+        nodes = [ThreadRecorder(), SynchronousConsumer()]
+        outputs = list(fluteline.pull(nodes, source=[1]))
+        self.assertEqual(nodes[0].entered_in, threading.current_thread())
+        self.assertEqual(outputs, [(1, threading.current_thread()) * 2])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            fluteline.pull([Consumer()])
+        with self.assertRaises(ValueError):
+            fluteline.pull([CountingProducer(1)], source=[1])
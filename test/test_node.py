@@ -1,8 +1,11 @@
+import socket
 import time
 import unittest
 
 import fluteline
-from .basic_nodes import Producer, Consumer, SynchronousConsumer
+from .basic_nodes import (
+    Producer, Consumer, SynchronousConsumer, PacedProducer, SocketReader,
+)
 
 
 class TestProducer(unittest.TestCase):
@@ -20,6 +23,74 @@ class TestProducer(unittest.TestCase):
         self.assertEqual(item, 1)
 
 
+class TestPacing(unittest.TestCase):
+
+    def test_rate(self):
+        producer = PacedProducer()
+        producer.output = fluteline.Queue()
+        producer.start()
+        time.sleep(0.2)
+        producer.stop()
+        producer.join(1)
+        self.assertFalse(producer.is_alive())
+        self.assertGreater(producer.output.qsize(), 10)
+        self.assertLess(producer.output.qsize(), 30)
+
+    def test_stop_while_pacing(self):
+        producer = PacedProducer()
+        producer.rate = 0.01
+        producer.output = fluteline.Queue()
+        producer.start()
+        time.sleep(0.05)
+        producer.stop()
+        producer.join(1)
+        self.assertFalse(producer.is_alive())
+
+    def test_high_water(self):
+        producer = Producer()
+        producer.high_water = 5
+        consumer = Consumer()
+        fluteline.connect([producer, consumer])
+        producer.start()
+        time.sleep(0.1)
+        self.assertLessEqual(consumer.input.qsize(), 6)
+        consumer.start()
+        self.assertEqual(consumer.output.get(), 2)
+        fluteline.stop([producer, consumer], timeout=1)
+
+
+class TestSelectorProducer(unittest.TestCase):
+
+    def setUp(self):
+        self.sock, self.other_sock = socket.socketpair()
+        self.producer = SocketReader(self.sock)
+        self.producer.output = fluteline.Queue()
+        self.producer.start()
+
+    def tearDown(self):
+        self.sock.close()
+        self.other_sock.close()
+
+    def test_produce_when_ready(self):
+        self.other_sock.send(b'hello')
+        self.assertEqual(self.producer.output.get(), b'hello')
+        self.producer.stop()
+
+    def test_immediate_stop(self):
+        start = time.time()
+        self.producer.stop()
+        self.producer.join(1)
+        self.assertFalse(self.producer.is_alive())
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_not_started(self):
+        producer = SocketReader(self.sock)
+        self.assertIsNone(producer._stop_reader)
+        producer.stop()
+        self.producer.stop()
+        self.producer.join(1)
+
+
 class TestPipeline(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,96 @@
+import array
+import operator
+import unittest
+
+import fluteline
+from fluteline import numeric
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def run(node, frames):
+    node.output = fluteline.Queue()
+    node.enter()
+    for frame in frames:
+        node.consume(frame)
+    frames = []
+    while not node.output.empty():
+        frames.append(list(node.output.get()))
+    return frames
+
+
+class TestArrayFrames(unittest.TestCase):
+    '''
+    ``array.array`` frames, with or without NumPy.
+    '''
+    def frames(self):
+        return [
+            array.array('d', [1, 5, 3]),
+            array.array('d', [2, 8, 4]),
+        ]
+
+    def test_map(self):
+        node = fluteline.MapFrames(lambda x: x * 2)
+        self.assertEqual(run(node, self.frames()), [[2, 10, 6], [4, 16, 8]])
+
+    def test_filter(self):
+        node = fluteline.FilterFrames(lambda x: x > 4)
+        self.assertEqual(run(node, self.frames()), [[5], [8]])
+        self.assertEqual(run(node, [array.array('d', [1])]), [])
+
+    def test_scan(self):
+        node = fluteline.ScanFrames(max)
+        self.assertEqual(run(node, self.frames()), [[1, 5, 5], [5, 8, 8]])
+        node = fluteline.ScanFrames(operator.add, initial=10)
+        self.assertEqual(run(node, self.frames()), [
+            [11, 16, 19], [21, 29, 33],
+        ])
+
+    def test_adapters(self):
+        nodes = [fluteline.Chunk(3, timeout=1), fluteline.Unchunk()]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        nodes[0].put_many([0.5, 1.5, 2.5, 3.5])
+        output = nodes[-1].output
+        self.assertEqual([output.get() for _ in range(4)], [
+            0.5, 1.5, 2.5, 3.5,
+        ])
+        fluteline.stop(nodes, timeout=2)
+
+
+@unittest.skipIf(numpy is None, 'NumPy not installed')
+class TestNumpyFrames(unittest.TestCase):
+
+    def frames(self):
+        return [numpy.array([1., 5., 3.]), numpy.array([2., 8., 4.])]
+
+    def test_as_frame(self):
+        frame = fluteline.as_frame([1, 2], 'l')
+        self.assertIsInstance(frame, numpy.ndarray)
+        self.assertEqual(frame.dtype, numpy.dtype('l'))
+
+    def test_map_and_filter(self):
+        node = fluteline.MapFrames(numpy.sqrt)
+        self.assertEqual(run(node, [numpy.array([4., 9.])]), [[2, 3]])
+        node = fluteline.FilterFrames(lambda x: x > 4)
+        self.assertEqual(run(node, self.frames()), [[5], [8]])
+
+    def test_scan(self):
+        node = fluteline.ScanFrames(numpy.maximum)
+        self.assertEqual(run(node, self.frames()), [[1, 5, 5], [5, 8, 8]])
+        node = fluteline.ScanFrames(max)
+        self.assertEqual(run(node, self.frames()), [[1, 5, 5], [5, 8, 8]])
+
+
+class TestWithoutNumpy(unittest.TestCase):
+
+    def test_as_frame(self):
+        real, numeric.numpy = numeric.numpy, None
+        try:
+            frame = fluteline.as_frame([1, 2], 'l')
+        finally:
+            numeric.numpy = real
+        self.assertEqual(frame, array.array('l', [1, 2]))
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import fluteline
+from .basic_nodes import Consumer
+
+
+class TestPersistentQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_fifo(self):
+        q = fluteline.PersistentQueue(self.path)
+        q.put_many(list(range(5)))
+        q.put({'a': b'x' * 1000})
+        self.assertEqual(q.qsize(), 6)
+        self.assertEqual(q.get(), 0)
+        self.assertEqual(q.get_many(3), [1, 2, 3])
+        self.assertEqual(q.get_many(10), [4, {'a': b'x' * 1000}])
+        self.assertTrue(q.empty())
+        q.close()
+
+    def test_resume_from_ack(self):
+        q = fluteline.PersistentQueue(self.path)
+        q.put_many(list(range(10)))
+        self.assertEqual(q.get_many(3), [0, 1, 2])
+        self.assertEqual(q.get(), 3)  # Acks 0-2
+        q.close()
+        q = fluteline.PersistentQueue(self.path)
+        self.assertEqual(q.qsize(), 7)
+        self.assertEqual(q.get(), 3)
+        q.ack()
+        q.put(10)
+        q.close()
+        q = fluteline.PersistentQueue(self.path)
+        self.assertEqual(q.get_many(10), [4, 5, 6, 7, 8, 9, 10])
+        q.close()
+
+    def test_segments(self):
+        q = fluteline.PersistentQueue(self.path, segment_size=64)
+        q.put_many([b'x' * 20 for _ in range(10)])
+        q.put(b'y' * 200)  # Larger than a segment
+        self.assertGreater(len(os.listdir(self.path)), 5)
+        q.close()
+        q = fluteline.PersistentQueue(self.path, segment_size=64)
+        self.assertEqual(q.get_many(10), [b'x' * 20] * 10)
+        self.assertEqual(q.get(), b'y' * 200)
+        q.ack()
+        self.assertEqual(len(os.listdir(self.path)), 2)  # ack, last segment
+        q.close()
+
+    def test_torn_write(self):
+        q = fluteline.PersistentQueue(self.path)
+        q.put(b'A' * 5000)
+        q.close()
+        # Crash before the count of the record was written
+        with open(os.path.join(self.path, '{:020d}.log'.format(0)), 'r+b') as f:
+            f.write(b'\0' * 4)
+        q = fluteline.PersistentQueue(self.path)
+        self.assertTrue(q.empty())
+        q.put(1)
+        q.close()
+        q = fluteline.PersistentQueue(self.path)
+        self.assertEqual(q.get_many(10), [1])
+        q.put(2)
+        q.close()
+        q = fluteline.PersistentQueue(self.path)
+        self.assertEqual(q.get_many(10), [1, 2])
+        q.close()
+
+    def test_overflow(self):
+        q = fluteline.PersistentQueue(self.path, 2, fluteline.DROP_NEWEST)
+        q.put_many(list(range(5)))
+        self.assertEqual(q.get_many(5), [0, 1])
+        self.assertEqual(q.dropped, 3)
+        q.close()
+        with self.assertRaises(ValueError):
+            fluteline.PersistentQueue(self.path, 2, fluteline.DROP_OLDEST)
+
+    def test_consumer_resumes(self):
+        consumer = Consumer()
+        consumer.input = fluteline.PersistentQueue(self.path)
+        fluteline.connect([consumer], fluteline.RingQueue)
+        self.assertIsInstance(consumer.input, fluteline.PersistentQueue)
+        consumer.put_many([1, 2, 3])
+        consumer.stop()
+        consumer.start()
+        consumer.join(1)
+        consumer.put(4)
+        consumer.input.close()
+        self.assertEqual(consumer.output.get_many(10), [2, 4, 6])
+
+        consumer = Consumer()
+        consumer.input = fluteline.PersistentQueue(self.path)
+        consumer.output = fluteline.Queue()
+        consumer.start()
+        consumer.stop()
+        consumer.join(1)
+        consumer.input.close()
+        self.assertEqual(consumer.output.get_many(10), [8])
@@ -0,0 +1,57 @@
+import unittest
+
+import fluteline
+from .basic_nodes import BatchConsumer, Consumer, SlowConsumer
+
+
+class TestPool(unittest.TestCase):
+
+    def test_unordered(self):
+        pool = fluteline.Pool(Consumer, 4)
+        nodes = [pool]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        pool.put_many(list(range(100)))
+        results = [pool.output.get() for _ in range(100)]
+        fluteline.stop(nodes)
+        pool.join(1)
+        self.assertFalse(pool.is_alive())
+        self.assertEqual(sorted(results), [i * 2 for i in range(100)])
+
+    def test_ordered(self):
+        pool = fluteline.Pool(SlowConsumer, 4, ordered=True)
+        pool.output = fluteline.Queue()
+        pool.start()
+        for i in range(50):
+            pool.put(i)
+        results = [pool.output.get() for _ in range(50)]
+        pool.stop()
+        pool.join(1)
+        self.assertFalse(pool.is_alive())
+        self.assertEqual(results, list(range(50)))
+        self.assertTrue(all(worker.entered for worker in pool.workers))
+
+    def test_batch_workers(self):
+        for _ in range(5):
+            pool = fluteline.Pool(BatchConsumer, 4)
+            nodes = [pool]
+            fluteline.connect(nodes)
+            fluteline.start(nodes)
+            pool.put_many(list(range(100)))
+            self.assertEqual(fluteline.stop(nodes, timeout=1), [])
+            results = pool.output.get_many(100)
+            self.assertEqual(sorted(results), [i * 2 for i in range(100)])
+
+    def test_shared_input(self):
+        pool = fluteline.Pool(Consumer, 3)
+        inputs = set(id(worker.input) for worker in pool.workers)
+        self.assertEqual(inputs, set([id(pool.input)]))
+
+    def test_ordered_pools_can_not_drop(self):
+        for overflow in [
+            fluteline.DROP_NEWEST, fluteline.DROP_OLDEST, fluteline.RAISE,
+        ]:
+            with self.assertRaises(ValueError):
+                fluteline.Pool(
+                    lambda: Consumer(10, overflow), 2, ordered=True,
+                )
@@ -0,0 +1,44 @@
+import os
+import unittest
+
+import fluteline
+from .basic_nodes import Producer, Consumer, ProcessProducer, ProcessConsumer
+
+
+class TestProcessProducer(unittest.TestCase):
+
+    def test_mixed_pipeline(self):
+        nodes = [ProcessProducer(), Consumer()]
+        fluteline.connect(nodes)
+        self.assertIsInstance(nodes[1].input, fluteline.ProcessQueue)
+        fluteline.start(nodes)
+        try:
+            self.assertEqual(nodes[1].output.get(), 2)
+        finally:
+            fluteline.stop(nodes)
+        nodes[0].join(5)
+        self.assertFalse(nodes[0].is_alive())
+
+
+class TestProcessConsumer(unittest.TestCase):
+
+    def test_mixed_pipeline(self):
+        nodes = [Producer(), ProcessConsumer()]
+        fluteline.connect(nodes)
+        self.assertIsInstance(nodes[1].output, fluteline.ProcessQueue)
+        fluteline.start(nodes)
+        try:
+            pid, item = nodes[1].output.get()
+        finally:
+            fluteline.stop(nodes)
+        self.assertEqual(item, 2)
+        self.assertNotEqual(pid, os.getpid())
+        nodes[1].join(5)
+        self.assertFalse(nodes[1].is_alive())
+
+    def test_connect_keeps_process_safe_queues(self):
+        nodes = [Producer(), ProcessConsumer(), Consumer()]
+        fluteline.connect(nodes, queue_class=fluteline.RingQueue)
+        self.assertIsInstance(nodes[1].input, fluteline.ProcessQueue)
+        self.assertIsInstance(nodes[2].input, fluteline.ProcessQueue)
+        self.assertIsInstance(nodes[2].output, fluteline.RingQueue)
@@ -0,0 +1,294 @@
+import threading
+import time
+import unittest
+
+import fluteline
+from .basic_nodes import (
+    Consumer, BatchConsumer, ControlledConsumer, GatedConsumer,
+)
+
+
+class TestBoundedQueue(unittest.TestCase):
+
+    def test_unbounded_by_default(self):
+        q = fluteline.Queue()
+        for i in range(1000):
+            q.put(i)
+        self.assertEqual(q.qsize(), 1000)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            fluteline.Queue(1, 'explode')
+
+    def test_drop_newest(self):
+        q = fluteline.Queue(2, fluteline.DROP_NEWEST)
+        for i in range(5):
+            q.put(i)
+        self.assertEqual([q.get(), q.get()], [0, 1])
+        self.assertEqual(q.dropped, 3)
+
+    def test_drop_oldest(self):
+        q = fluteline.Queue(2, fluteline.DROP_OLDEST)
+        for i in range(5):
+            q.put(i)
+        self.assertEqual([q.get(), q.get()], [3, 4])
+        self.assertEqual(q.dropped, 3)
+
+    def test_raise(self):
+        q = fluteline.Queue(1, fluteline.RAISE)
+        q.put(0)
+        with self.assertRaises(fluteline.Full):
+            q.put(1)
+
+    def test_block(self):
+        q = fluteline.Queue(1)
+        q.put(0)
+
+        def get_later():
+            time.sleep(0.05)
+            q.get()
+
+        threading.Thread(target=get_later).start()
+        q.put(1)
+        self.assertEqual(q.get(), 1)
+        self.assertGreater(q.blocked_time, 0)
+
+
+class TestManyItems(unittest.TestCase):
+
+    def test_put_many_get_many(self):
+        q = fluteline.Queue()
+        q.put_many(list(range(5)))
+        self.assertEqual(q.get_many(3), [0, 1, 2])
+        self.assertEqual(q.get_many(3), [3, 4])
+
+    def test_put_many_bounded(self):
+        q = fluteline.Queue(2, fluteline.DROP_NEWEST)
+        q.put_many(list(range(5)))
+        self.assertEqual(q.get_many(5), [0, 1])
+        self.assertEqual(q.dropped, 3)
+
+    def test_get_many_waits_for_timeout(self):
+        q = fluteline.Queue()
+        q.put(0)
+
+        def put_later():
+            time.sleep(0.02)
+            q.put(1)
+
+        threading.Thread(target=put_later).start()
+        self.assertEqual(q.get_many(2, timeout=1), [0, 1])
+
+
+class TestBoundedConsumer(unittest.TestCase):
+
+    def test_stop_is_never_dropped(self):
+        consumer = Consumer(maxsize=1, overflow=fluteline.DROP_NEWEST)
+        consumer.output = fluteline.Queue()
+        consumer.put(1)
+        consumer.start()
+        consumer.stop()
+        consumer.join(1)
+        self.assertFalse(consumer.is_alive())
+
+    def test_drop_oldest_keeps_stop(self):
+        queue_classes = [
+            fluteline.Queue, fluteline.PriorityQueue, fluteline.RingQueue,
+            fluteline.ProcessQueue,
+        ]
+        for queue_class in queue_classes:
+            consumer = GatedConsumer()
+            consumer.input = queue_class(2, fluteline.DROP_OLDEST)
+            consumer.output = fluteline.Queue()
+            consumer.start()
+            consumer.put(1)
+            consumer.consuming.wait(1)
+            consumer.put(2)
+            consumer.stop()
+            consumer.put_many([3, 4, 5])
+            consumer.gate.set()
+            consumer.join(1)
+            self.assertFalse(consumer.is_alive(), queue_class)
+
+    def test_clear_keeps_stop(self):
+        for queue_class in [fluteline.Queue, fluteline.RingQueue]:
+            consumer = Consumer()
+            consumer.input = queue_class()
+            consumer.output = fluteline.Queue()
+            consumer.put_many([1, 2])
+            consumer.stop()
+            self.assertEqual(consumer.input.clear(), 2)
+            consumer.start()
+            consumer.join(1)
+            self.assertFalse(consumer.is_alive(), queue_class)
+
+
+class TestBatchConsumer(unittest.TestCase):
+
+    def test_batches_and_termination(self):
+        consumer = BatchConsumer()
+        consumer.output = fluteline.Queue()
+        consumer.put_many(list(range(25)))
+        consumer.stop()
+        consumer.put(100)
+        consumer.start()
+        consumer.join(1)
+        self.assertFalse(consumer.is_alive())
+        self.assertEqual(
+            [len(batch) for batch in consumer.batches], [10, 10, 5],
+        )
+        self.assertEqual(consumer.output.get_many(100), [
+            item * 2 for item in range(25)
+        ])
+
+
+class TestControlLane(unittest.TestCase):
+
+    def test_control_first(self):
+        for queue_class in [fluteline.Queue, fluteline.RingQueue]:
+            q = queue_class()
+            q.put_many([0, 1])
+            q.put_control('a')
+            q.put(2)
+            q.put_control('b')
+            self.assertEqual(q.qsize(), 5)
+            self.assertEqual(q.get(), 'a')
+            self.assertEqual(q.get_many(10), ['b', 0, 1, 2])
+
+    def test_control_ignores_bounds(self):
+        for queue_class in [fluteline.Queue, fluteline.RingQueue]:
+            q = queue_class(1, fluteline.DROP_OLDEST)
+            q.put_control('a')
+            q.put(0)
+            q.put(1)
+            q.put_control('b')
+            self.assertEqual(q.clear(), 1)
+            self.assertEqual(q.get_many(10), ['a', 'b'])
+
+    def test_wakeup(self):
+        q = fluteline.RingQueue()
+
+        def put_later():
+            time.sleep(0.02)
+            q.put_control('a')
+
+        threading.Thread(target=put_later).start()
+        self.assertEqual(q.get(), 'a')
+
+
+class TestPriorityQueue(unittest.TestCase):
+
+    def test_priorities(self):
+        q = fluteline.PriorityQueue(levels=3)
+        q.put_many([0, 1])
+        q.put(2, priority=2)
+        q.put_many([3, 4], priority=1)
+        q.put_control('a')
+        q.put(5, priority=2)
+        self.assertEqual(q.qsize(), 7)
+        self.assertEqual(q.get_many(10), ['a', 2, 5, 3, 4, 0, 1])
+        with self.assertRaises(ValueError):
+            q.put(6, priority=3)
+
+    def test_drop_oldest_drops_lowest_priority(self):
+        q = fluteline.PriorityQueue(2, fluteline.DROP_OLDEST)
+        q.put(0, priority=1)
+        q.put(1)
+        q.put(2)
+        q.put(3, priority=1)
+        self.assertEqual(q.get_many(10), [0, 3])
+        self.assertEqual(q.dropped, 2)
+
+
+class TestControlMessages(unittest.TestCase):
+
+    def test_control_before_data(self):
+        consumer = ControlledConsumer()
+        consumer.output = fluteline.Queue()
+        consumer.put_many([0, 1])
+        consumer.put_control('flush')
+        consumer.stop()
+        consumer.start()
+        consumer.join(1)
+        self.assertEqual(consumer.output.get_many(10), [
+            ('control', 'flush'), 0, 1,
+        ])
+
+    def test_batches(self):
+        consumer = ControlledConsumer()
+        consumer.batch_size = 10
+        consumer.output = fluteline.Queue()
+        consumer.put_many([0, 1])
+        consumer.put_control('flush')
+        consumer.stop()
+        consumer.put(2)
+        consumer.start()
+        consumer.join(1)
+        self.assertEqual(consumer.output.get_many(10), [
+            ('control', 'flush'), 0, 1,
+        ])
+
+    def test_stop_without_draining(self):
+        consumer = ControlledConsumer()
+        consumer.output = fluteline.Queue()
+        consumer.put_many(list(range(100)))
+        consumer.stop(drain=False)
+        consumer.start()
+        consumer.join(1)
+        self.assertFalse(consumer.is_alive())
+        self.assertTrue(consumer.output.empty())
+        self.assertEqual(consumer.input.qsize(), 100)
+
+
+class TestRingQueue(unittest.TestCase):
+
+    def test_fifo(self):
+        q = fluteline.RingQueue()
+        q.put_many([0, 1, 2])
+        q.put(3)
+        self.assertEqual([q.get(), q.get()], [0, 1])
+        self.assertEqual(q.get_many(10), [2, 3])
+        self.assertTrue(q.empty())
+
+    def test_wakeup(self):
+        q = fluteline.RingQueue()
+
+        def put_later():
+            time.sleep(0.02)
+            q.put(1)
+
+        threading.Thread(target=put_later).start()
+        self.assertEqual(q.get(), 1)
+
+    def test_block(self):
+        q = fluteline.RingQueue(1)
+        q.put(0)
+
+        def get_later():
+            time.sleep(0.05)
+            q.get()
+
+        threading.Thread(target=get_later).start()
+        q.put(1)
+        self.assertEqual(q.get(), 1)
+        self.assertGreater(q.blocked_time, 0)
+
+    def test_drop_policies(self):
+        q = fluteline.RingQueue(2, fluteline.DROP_OLDEST)
+        q.put_many(list(range(5)))
+        self.assertEqual(q.get_many(5), [3, 4])
+        q = fluteline.RingQueue(2, fluteline.DROP_NEWEST)
+        q.put_many(list(range(5)))
+        self.assertEqual(q.get_many(5), [0, 1])
+        self.assertEqual(q.dropped, 3)
+
+    def test_many_messages_between_threads(self):
+        q = fluteline.RingQueue(16)
+        n = 10000
+
+        def produce():
+            for i in range(n):
+                q.put(i)
+
+        threading.Thread(target=produce).start()
+        self.assertEqual([q.get() for _ in range(n)], list(range(n)))
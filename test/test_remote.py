@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import fluteline
+from .basic_nodes import Consumer
+
+CODEC = fluteline.PickleCodec()
+
+
+class TestRemote(unittest.TestCase):
+
+    def test_tcp(self):
+        source = fluteline.RemoteSource(('127.0.0.1', 0), CODEC)
+        sink = fluteline.RemoteSink(source.address, CODEC)
+        source.output = fluteline.Queue()
+        fluteline.start([source, sink])
+        sink.put_many(list(range(1000)))
+        results = [source.output.get() for _ in range(1000)]
+        self.assertEqual(fluteline.stop([sink, source], timeout=2), [])
+        self.assertEqual(results, list(range(1000)))
+
+    def test_backpressure(self):
+        source = fluteline.RemoteSource(('127.0.0.1', 0), CODEC)
+        source.window = 4
+        consumer = Consumer(maxsize=2)
+        source.output = consumer
+        sink = fluteline.RemoteSink(source.address, CODEC)
+        fluteline.start([source, sink])
+        sink.put_many(list(range(100)))
+        time.sleep(0.2)
+        # The consumer isn't running, so only a few messages got through
+        consumer.output = fluteline.Queue()
+        try:
+            self.assertEqual(consumer.input.qsize(), 2)
+            self.assertGreater(sink.input.qsize(), 0)
+        finally:
+            consumer.start()
+        results = [consumer.output.get() for _ in range(100)]
+        self.assertEqual(results, [i * 2 for i in range(100)])
+        fluteline.stop([sink, source, consumer], timeout=2)
+
+    def test_stop_without_credits(self):
+        source = fluteline.RemoteSource(('127.0.0.1', 0), CODEC)
+        self.addCleanup(source.exit)
+        sink = fluteline.RemoteSink(source.address, CODEC)
+        sink.timeout = 0.05
+        sink.start()
+        sink.put(1)  # The source isn't running, so no credits come
+        time.sleep(0.05)
+        self.assertEqual(fluteline.stop([sink], timeout=2), [])
+
+    def test_unix_socket_and_reconnect(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        address = os.path.join(directory, 'socket')
+        sink = fluteline.RemoteSink(address, CODEC)
+        sink.reconnect_delay = 0.01
+        sink.start()
+        sink.put(1)
+        time.sleep(0.05)  # The sink retries to connect
+
+        source = fluteline.RemoteSource(address, CODEC)
+        source.output = fluteline.Queue()
+        source.start()
+        self.assertEqual(source.output.get(), 1)
+        self.assertEqual(fluteline.stop([source], timeout=2), [])
+
+        sink.put(2)
+        source = fluteline.RemoteSource(address, CODEC)
+        source.output = fluteline.Queue()
+        source.start()
+        sink.put(3)
+        results = set()
+        while 3 not in results:
+            results.add(source.output.get())
+        self.assertEqual(fluteline.stop([sink, source], timeout=2), [])
@@ -0,0 +1,122 @@
+import threading
+import unittest
+
+import fluteline
+from .basic_nodes import BatchConsumer, Consumer, GatedConsumer, Tagger
+
+
+class Feeder(object):
+    '''
+    Put ``count`` numbers into a node's current ``output`` from a thread,
+    like an upstream node would.
+    '''
+    def __init__(self, count):
+        self.output = None
+        self.thread = threading.Thread(target=self.feed, args=(count,))
+
+    def feed(self, count):
+        for i in range(count):
+            self.output.put(i)
+
+
+class TestRewiring(unittest.TestCase):
+
+    def setUp(self):
+        self.feeder = Feeder(2000)
+        self.nodes = [self.feeder, Tagger('a')]
+        fluteline.connect(self.nodes)
+        self.nodes[1].start()
+        self.feeder.thread.start()
+
+    def tearDown(self):
+        fluteline.stop(self.nodes[1:], timeout=1)
+
+    def outputs(self):
+        self.feeder.thread.join()
+        output = self.nodes[-1].output
+        return [output.get() for _ in range(2000)]
+
+    def test_replace(self):
+        old = fluteline.replace_node(self.nodes, 1, Tagger('b'))
+        self.assertFalse(old.is_alive())
+        outputs = self.outputs()
+        self.assertEqual([item for _, item in outputs], list(range(2000)))
+        tags = ''.join(tag for tag, _ in outputs).rstrip('b')
+        self.assertEqual(tags, 'a' * len(tags))
+        self.assertTrue(self.nodes[-1].output.empty())
+
+    def test_replace_batch(self):
+        fluteline.replace_node(self.nodes, 1, BatchConsumer())
+        items = []
+        for output in self.outputs():
+            if isinstance(output, tuple):
+                items.append(output[1])
+            else:
+                items.append(output // 2)
+        self.assertEqual(items, list(range(2000)))
+        self.assertTrue(self.nodes[-1].output.empty())
+
+    def test_insert_and_remove(self):
+        fluteline.insert_node(self.nodes, 2, Tagger('t'))
+        self.assertEqual(len(self.nodes), 3)
+        fluteline.remove_node(self.nodes, 1)
+        self.assertEqual(len(self.nodes), 2)
+        items = []
+        tags = ''
+        for tag, item in self.outputs():
+            tags += tag
+            if isinstance(item, tuple):
+                item = item[1]  # Went through the removed node
+            items.append(item)
+        # 'a' sends on the messages it consumed before the insertion
+        tags = tags.lstrip('a')
+        self.assertEqual(tags, 't' * len(tags))
+        self.assertEqual(sorted(items), list(range(2000)))
+        self.assertTrue(self.nodes[-1].output.empty())
+
+    def test_instrumented(self):
+        fluteline.instrument(self.nodes[1:])
+        fluteline.insert_node(self.nodes, 2, Tagger('t'))
+        self.outputs()
+        self.assertEqual(self.nodes[1].stats.messages_out, 2000)
+
+    def test_timeout(self):
+        gated = GatedConsumer()
+        nodes = [gated]
+        fluteline.connect(nodes)
+        gated.start()
+        gated.put(1)
+        gated.consuming.wait()
+        with self.assertRaises(RuntimeError):
+            fluteline.replace_node(nodes, 0, Consumer(), timeout=0.01)
+        self.assertIs(nodes[0], gated)
+        gated.gate.set()
+        gated.join(1)
+        self.assertFalse(gated.is_alive())
+        self.outputs()
+
+    def test_incompatible(self):
+        nodes = [Consumer()]
+        fluteline.connect(nodes, fluteline.RingQueue)
+        with self.assertRaises(ValueError):
+            fluteline.replace_node(nodes, 0, fluteline.Pool(Consumer, 2))
+        nodes = [Consumer()]
+        fluteline.connect(nodes)
+        fluteline.trace(nodes)
+        with self.assertRaises(ValueError):
+            fluteline.replace_node(nodes, 0, Consumer())
+        self.outputs()
+
+    def test_ordered_pools(self):
+        pool = fluteline.Pool(Consumer, 2, ordered=True)
+        nodes = [pool]
+        fluteline.connect(nodes)
+        with self.assertRaises(ValueError):
+            fluteline.replace_node(nodes, 0, Consumer())
+        with self.assertRaises(ValueError):
+            fluteline.remove_node(nodes, 0)
+        with self.assertRaises(ValueError):
+            fluteline.replace_node(
+                self.nodes, 1, fluteline.Pool(Consumer, 2, ordered=True),
+            )
+        self.outputs()
@@ -0,0 +1,170 @@
+import threading
+import time
+import unittest
+
+import fluteline
+from .basic_nodes import (
+    BatchConsumer, Consumer, FlakyConsumer, SlowConsumer,
+)
+
+
+class TestResize(unittest.TestCase):
+
+    def test_resize_running(self):
+        pool = fluteline.Pool(Consumer, 2)
+        nodes = [pool]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        pool.resize(4)
+        self.assertEqual(pool.size, 4)
+        pool.put_many(list(range(100)))
+        pool.resize(1)
+        self.assertEqual(pool.size, 1)
+        results = [pool.output.get() for _ in range(100)]
+        fluteline.stop(nodes)
+        pool.join(1)
+        self.assertFalse(pool.is_alive())
+        self.assertEqual(sorted(results), [i * 2 for i in range(100)])
+
+    def test_resize_after_crash(self):
+        pool = fluteline.Pool(FlakyConsumer, 3)
+        nodes = [pool]
+        fluteline.connect(nodes)
+        hook = getattr(threading, 'excepthook', None)
+        threading.excepthook = lambda args: None  # Keep the output clean
+        try:
+            fluteline.start(nodes)
+            pool.put(-1)
+            deadline = time.time() + 1
+            while pool.size == 3 and time.time() < deadline:
+                time.sleep(0.001)
+        finally:
+            if hook is None:
+                del threading.excepthook
+            else:
+                threading.excepthook = hook
+        self.assertEqual(pool.size, 2)
+        pool.resize(2)  # The crashed worker doesn't count
+        pool.resize(1)
+        pool.put_many(list(range(10)))
+        results = [pool.output.get() for _ in range(10)]
+        self.assertEqual(sorted(results), list(range(10)))
+        self.assertEqual(pool.size, 1)
+        self.assertTrue(pool.is_alive())
+        fluteline.stop(nodes)
+        pool.join(1)
+        self.assertFalse(pool.is_alive())
+
+    def test_resize_ordered(self):
+        pool = fluteline.Pool(SlowConsumer, 1, ordered=True)
+        pool.output = fluteline.Queue()
+        pool.start()
+        for i in range(20):
+            pool.put(i)
+        pool.resize(3)
+        for i in range(20, 40):
+            pool.put(i)
+        pool.resize(2)
+        results = [pool.output.get() for _ in range(40)]
+        pool.stop()
+        pool.join(1)
+        self.assertFalse(pool.is_alive())
+        self.assertEqual(results, list(range(40)))
+
+    def test_resize_batch(self):
+        pool = fluteline.Pool(BatchConsumer, 3)
+        nodes = [pool]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        pool.put_many(list(range(100)))
+        pool.resize(1)
+        results = [pool.output.get() for _ in range(100)]
+        deadline = time.time() + 1
+        while len(pool.workers) > 1 and time.time() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(pool.size, 1)
+        self.assertEqual(len(pool.workers), 1)
+        fluteline.stop(nodes)
+        pool.join(1)
+        self.assertFalse(pool.is_alive())
+        self.assertEqual(sorted(results), [i * 2 for i in range(100)])
+
+    def test_resize_supervised(self):
+        pool = fluteline.Pool(FlakyConsumer, 1)
+        nodes = [pool]
+        fluteline.connect(nodes)
+        fluteline.supervise(nodes, backoff=0)
+        pool.resize(2)
+        self.assertIn('consume', vars(pool.workers[1]))  # Guarded
+        fluteline.start(nodes)
+        pool.put_many([-1, -1, 1, 2])
+        results = [pool.output.get() for _ in range(2)]
+        self.assertEqual(sorted(results), [1, 2])
+        self.assertEqual(pool.size, 2)
+        fluteline.stop(nodes)
+        pool.join(1)
+        self.assertFalse(pool.is_alive())
+
+    def test_resize_not_started(self):
+        pool = fluteline.Pool(Consumer, 2)
+        pool.resize(3)
+        self.assertEqual(pool.size, 3)
+        pool.resize(1)
+        self.assertEqual(pool.size, 1)
+        self.assertFalse(pool.is_alive())
+        with self.assertRaises(ValueError):
+            pool.resize(0)
+
+
+class TestAutoscaler(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = fluteline.Pool(SlowConsumer, 1)
+        self.nodes = [self.pool]
+        fluteline.connect(self.nodes)
+        self.scaler = fluteline.Autoscaler(
+            [self.pool], max_size=4, interval=0.02, high_water=5,
+            cooldown=0.05,
+        )
+        self.scaler.output = fluteline.Queue()
+        fluteline.start(self.nodes)
+
+    def tearDown(self):
+        fluteline.stop(self.nodes)
+        self.pool.join(1)
+
+    def test_grow_and_shrink(self):
+        self.pool.put_many(list(range(300)))
+        while self.pool.size == 1:
+            self.scaler.produce()
+        self.assertGreater(self.pool.size, 1)
+        self.assertLessEqual(self.pool.size, 4)
+        grow = self.scaler.output.get()
+        self.assertEqual(grow['from'], 1)
+        self.assertEqual(grow['to'], self.pool.size)
+        results = [self.pool.output.get() for _ in range(300)]
+        self.assertEqual(sorted(results), list(range(300)))
+        deadline = time.time() + 5
+        while self.pool.size > 1 and time.time() < deadline:
+            self.scaler.produce()
+        self.assertEqual(self.pool.size, 1)
+
+    def test_hysteresis(self):
+        self.pool.put_many(list(range(300)))
+        while self.pool.size == 1:
+            self.scaler.produce()
+        size = self.pool.size
+        self.scaler.cooldown = 60
+        self.scaler.produce()
+        self.assertEqual(self.pool.size, size)
+        for _ in range(300):
+            self.pool.output.get()
+        self.scaler.produce()
+        self.assertEqual(self.pool.size, size)
+
+    def test_bounds(self):
+        with self.assertRaises(ValueError):
+            fluteline.Autoscaler([self.pool], min_size=3, max_size=2)
+        scaler = fluteline.Autoscaler([self.pool], min_size=2, interval=0)
+        scaler.produce()
+        self.assertEqual(self.pool.size, 2)
@@ -0,0 +1,63 @@
+import pickle
+import unittest
+
+import fluteline
+
+
+class TestCodecs(unittest.TestCase):
+
+    def test_pickle(self):
+        codec = fluteline.PickleCodec()
+        msg = {'a': (1, 2.0), 'b': 'c'}
+        self.assertEqual(codec.decode(codec.encode(msg)), msg)
+
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, 'pickle protocol 5 needed')
+    def test_pickle_out_of_band(self):
+        codec = fluteline.PickleCodec()
+        data = pickle.PickleBuffer(bytearray(b'x' * 1000))
+        frames = codec.encode({'data': data})
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(bytes(codec.decode(frames)['data']), b'x' * 1000)
+
+    def test_struct(self):
+        codec = fluteline.StructCodec('<qd')
+        self.assertEqual(codec.decode(codec.encode((1, 0.5))), (1, 0.5))
+
+    def test_struct_fields(self):
+        codec = fluteline.StructCodec('<qd', fields=('id', 'value'))
+        msg = {'id': 3, 'value': 1.5}
+        self.assertEqual(codec.decode(codec.encode(msg)), msg)
+
+
+class TestFraming(unittest.TestCase):
+
+    def test_round_trip_in_pieces(self):
+        messages = [[b'a', b'bc'], [b''], [b'x' * 300]]
+        stream = b''.join(
+            bytes(buf) for frames in messages for buf in fluteline.frame(frames)
+        )
+        reader = fluteline.FrameReader()
+        received = []
+        for i in range(0, len(stream), 7):
+            received.extend(reader.feed(stream[i:i + 7]))
+        self.assertEqual(received, messages)
+
+    def test_corrupt_count(self):
+        reader = fluteline.FrameReader()
+        with self.assertRaises(ValueError):
+            reader.feed(b'\xff' * 8)
+
+
+class TestProcessQueueCodec(unittest.TestCase):
+
+    def test_codec(self):
+        q = fluteline.ProcessQueue(codec=fluteline.StructCodec('<qd'))
+        q.put((1, 0.5))
+        q.put_many([(2, 1.5), (3, 2.5)])
+        self.assertEqual(q.get(), (1, 0.5))
+        self.assertEqual(q.get_many(2, timeout=1), [(2, 1.5), (3, 2.5)])
+
+    def test_control_messages_are_not_encoded(self):
+        q = fluteline.ProcessQueue(codec=fluteline.StructCodec('<q'))
+        q._put_blocking('stop')
+        self.assertEqual(q.get(), 'stop')
@@ -0,0 +1,70 @@
+import time
+import unittest
+
+import fluteline
+from .basic_nodes import Consumer, SharedBufferReader
+
+
+@unittest.skipIf(
+    not hasattr(fluteline, 'SharedMemoryPool'), 'shared memory not available',
+)
+class TestSharedMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = fluteline.SharedMemoryPool(slot_size=4096, slots=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_share_and_release(self):
+        handle = self.pool.share(b'abc' * 100)
+        self.assertEqual(len(handle), 300)
+        self.assertEqual(handle.tobytes(), b'abc' * 100)
+        self.assertEqual(self.pool.in_use(), 1)
+        handle.retain()
+        handle.release()
+        self.assertEqual(self.pool.in_use(), 1)
+        handle.release()
+        self.assertEqual(self.pool.in_use(), 0)
+
+    def test_too_large(self):
+        with self.assertRaises(ValueError):
+            self.pool.share(bytes(5000))
+
+    def test_queue_shares_large_buffers(self):
+        q = fluteline.SharedMemoryQueue(self.pool, min_size=100)
+        q.put(b'small')
+        q.put(bytearray(200))
+        self.assertEqual(q.get(), b'small')
+        handle = q.get()
+        self.assertIsInstance(handle, fluteline.SharedBuffer)
+        handle.release()
+        q.put(bytes(200))
+        time.sleep(0.1)  # Let the feeder thread flush the item to the pipe
+        self.assertEqual(q.clear(), 1)
+        self.assertEqual(self.pool.in_use(), 0)
+
+    def test_clear_keeps_stop(self):
+        consumer = Consumer()
+        consumer.input = fluteline.SharedMemoryQueue(self.pool, min_size=100)
+        consumer.output = fluteline.Queue()
+        consumer.put(bytes(200))
+        consumer.stop()
+        time.sleep(0.1)  # Let the feeder thread flush the items to the pipe
+        self.assertEqual(consumer.input.clear(), 1)
+        self.assertEqual(self.pool.in_use(), 0)
+        consumer.start()
+        consumer.join(1)
+        self.assertFalse(consumer.is_alive())
+
+    def test_across_processes(self):
+        reader = SharedBufferReader()
+        reader.input = fluteline.SharedMemoryQueue(self.pool, min_size=100)
+        fluteline.connect([reader])
+        reader.start()
+        for _ in range(10):
+            reader.put(b'data' + bytes(1000))
+        results = [reader.output.get() for _ in range(10)]
+        self.assertEqual(fluteline.stop([reader], timeout=5), [])
+        self.assertEqual(results, [b'data:1004'] * 10)
+        self.assertEqual(self.pool.in_use(), 0)
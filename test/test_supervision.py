@@ -0,0 +1,88 @@
+import threading
+import time
+import unittest
+
+import fluteline
+from .basic_nodes import (
+    Consumer, FlakyConsumer, FlakyProcessConsumer, FlakyProducer,
+)
+
+
+class TestSupervision(unittest.TestCase):
+
+    def setUp(self):
+        self.errors = []
+        self.dead_letters = fluteline.Queue()
+
+    def on_error(self, node, error, msg):
+        self.errors.append((node, msg))
+
+    def test_restart_and_dead_letters(self):
+        nodes = [FlakyConsumer(), Consumer()]
+        fluteline.connect(nodes)
+        supervisor = fluteline.supervise(
+            nodes, backoff=0.05, on_error=self.on_error,
+            dead_letters=self.dead_letters,
+        )
+        fluteline.start(nodes)
+        start = time.time()
+        nodes[0].put_many([1, -2, 3, -4, 5])
+        results = [nodes[-1].output.get() for _ in range(3)]
+        self.assertGreaterEqual(time.time() - start, 0.15)  # 0.05 + 0.1
+        fluteline.stop(nodes, timeout=1)
+        self.assertEqual(results, [2, 6, 10])
+        self.assertEqual(supervisor.restarts, 2)
+        self.assertEqual(nodes[0].enters, 3)
+        self.assertEqual(self.errors, [(nodes[0], -2), (nodes[0], -4)])
+        letters = self.dead_letters.get_many(10)
+        self.assertEqual([letter.msg for letter in letters], [-2, -4])
+        self.assertIsInstance(letters[0].error, ValueError)
+
+    def test_give_up(self):
+        consumer = FlakyConsumer()
+        fluteline.connect([consumer])
+        supervisor = fluteline.supervise(
+            [consumer], max_restarts=1, backoff=0,
+            dead_letters=self.dead_letters,
+        )
+        hook = getattr(threading, 'excepthook', None)
+        threading.excepthook = lambda args: None  # Keep the output clean
+        try:
+            consumer.start()
+            consumer.put_many([-1, -2, 3])
+            consumer.join(1)
+        finally:
+            if hook is None:
+                del threading.excepthook
+            else:
+                threading.excepthook = hook
+        self.assertFalse(consumer.is_alive())
+        self.assertEqual(supervisor.failed, [consumer])
+        consumer.put(4)
+        letters = self.dead_letters.get_many(10)
+        self.assertEqual([letter.msg for letter in letters], [-1, -2, 3, 4])
+        self.assertTrue(consumer.input.empty())
+
+    def test_producer(self):
+        producer = FlakyProducer()
+        fluteline.connect([producer])
+        supervisor = fluteline.supervise([producer], backoff=0)
+        producer.start()
+        self.assertEqual([producer.output.get() for _ in range(2)], [1, 3])
+        fluteline.stop([producer], timeout=1)
+        self.assertEqual(supervisor.restarts, 1)
+
+    def test_process_dead_letters(self):
+        nodes = [FlakyProcessConsumer(), Consumer()]
+        fluteline.connect(nodes)
+        dead_letters = fluteline.ProcessQueue()
+        fluteline.supervise(nodes, backoff=0, dead_letters=dead_letters)
+        fluteline.start(nodes)
+        nodes[0].put_many([1, -2, 3])
+        results = [nodes[-1].output.get() for _ in range(2)]
+        letter = dead_letters.get()
+        fluteline.stop(nodes, timeout=1)
+        self.assertEqual(results, [2, 6])
+        self.assertEqual(letter.msg, -2)
+        self.assertIn('FlakyProcessConsumer', letter.node)
+        self.assertIsInstance(letter.error, ValueError)
@@ -0,0 +1,56 @@
+import unittest
+
+import fluteline
+from .basic_nodes import Producer, Consumer, BatchConsumer, SynchronousConsumer
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = fluteline.Histogram()
+        self.assertIsNone(histogram.percentile(50))
+        for ms in range(1, 101):
+            histogram.add(ms / 1000.0)
+        # Buckets are 10% wide
+        self.assertTrue(0.05 <= histogram.percentile(50) <= 0.05 * 1.1)
+        self.assertTrue(0.099 <= histogram.percentile(99) <= 0.1)
+        self.assertEqual(histogram.percentile(100), 0.1)
+        self.assertEqual(histogram.snapshot()['count'], 100)
+
+    def test_zero(self):
+        histogram = fluteline.Histogram()
+        histogram.add(0)
+        self.assertEqual(histogram.percentile(50), 0)
+
+
+class TestTrace(unittest.TestCase):
+
+    def run_line(self, nodes, sample=1):
+        fluteline.connect(nodes)
+        tracer = fluteline.trace(nodes, sample)
+        fluteline.start(nodes)
+        results = [nodes[-1].output.get() for _ in range(20)]
+        fluteline.stop(nodes, timeout=1)
+        return tracer, results
+
+    def test_consumers_see_plain_messages(self):
+        nodes = [Producer(), Consumer(), BatchConsumer(), Consumer()]
+        tracer, results = self.run_line(nodes)
+        self.assertEqual(results, [8] * 20)
+        report = tracer.report()
+        self.assertEqual(
+            [stage['name'] for stage in report['stages']],
+            ['Producer', 'Consumer', 'BatchConsumer', 'Consumer'],
+        )
+        self.assertGreaterEqual(report['end_to_end']['count'], 20)
+        self.assertGreater(report['stages'][1]['count'], 0)
+
+    def test_sampling(self):
+        producer, consumer = Producer(), SynchronousConsumer()
+        nodes = [producer, consumer]
+        fluteline.connect(nodes)
+        tracer = fluteline.trace(nodes, sample=10)
+        for _ in range(100):
+            producer.output.put(1)
+        self.assertEqual(tracer.end_to_end.count, 10)
+        self.assertEqual(consumer.output.get_many(100), [2] * 100)
@@ -1,7 +1,10 @@
+import threading
 import unittest
 
 import fluteline
-from .basic_nodes import Producer, Consumer
+from .basic_nodes import (
+    Producer, Consumer, SlowConsumer, BlockedProducer, FlakyConsumer,
+)
 
 
 class TestUtilities(unittest.TestCase):
@@ -15,3 +18,77 @@ class TestUtilities(unittest.TestCase):
         self.assertEqual(n1.output, n2)
         self.assertEqual(n2.output, n3)
         self.assertIsInstance(n3.output, fluteline.Queue)
+
+    def test_connect_queue_class(self):
+        nodes = [Producer(), Consumer(maxsize=5), Consumer()]
+        fluteline.connect(nodes, queue_class=fluteline.RingQueue)
+        self.assertIsInstance(nodes[1].input, fluteline.RingQueue)
+        self.assertEqual(nodes[1].input.maxsize, 5)
+        self.assertIsInstance(nodes[2].input, fluteline.RingQueue)
+        self.assertIsInstance(nodes[2].output, fluteline.RingQueue)
+
+    def test_connect_queue_class_per_connection(self):
+        nodes = [Producer(), Consumer(), Consumer()]
+        fluteline.connect(
+            nodes, queue_class=[None, fluteline.RingQueue, None, None],
+        )
+        self.assertIsInstance(nodes[1].input, fluteline.RingQueue)
+        self.assertIsInstance(nodes[2].input, fluteline.Queue)
+        self.assertIsInstance(nodes[2].output, fluteline.Queue)
+
+
+class TestStop(unittest.TestCase):
+
+    def test_drain(self):
+        nodes = [SlowConsumer()]
+        fluteline.connect(nodes)
+        nodes[0].put_many(list(range(10)))
+        fluteline.start(nodes)
+        self.assertEqual(fluteline.stop(nodes, timeout=5), [])
+        self.assertEqual(nodes[0].output.qsize(), 10)
+
+    def test_discard(self):
+        nodes = [SlowConsumer()]
+        fluteline.connect(nodes)
+        nodes[0].put_many(list(range(1000)))
+        fluteline.start(nodes)
+        self.assertEqual(fluteline.stop(nodes, timeout=5, drain=False), [])
+        self.assertLess(nodes[0].output.qsize(), 1000)
+        self.assertGreater(nodes[0].input.dropped, 0)
+
+    def test_discard_releases_blocked_producers(self):
+        nodes = [Producer(), SlowConsumer(maxsize=1)]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        self.assertEqual(fluteline.stop(nodes, timeout=5, drain=False), [])
+
+    def test_report_nodes_that_did_not_stop(self):
+        nodes = [BlockedProducer(), Consumer()]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        self.assertEqual(fluteline.stop(nodes, timeout=0.1), [nodes[0]])
+        nodes[0].join()
+
+    def test_crashed_consumer_with_full_input(self):
+        consumer = FlakyConsumer()
+        consumer.input = fluteline.Queue(2)
+        nodes = [consumer]
+        fluteline.connect(nodes)
+        hook = getattr(threading, 'excepthook', None)
+        threading.excepthook = lambda args: None  # Keep the output clean
+        try:
+            consumer.start()
+            consumer.put(-1)
+            consumer.join(1)
+        finally:
+            if hook is None:
+                del threading.excepthook
+            else:
+                threading.excepthook = hook
+        consumer.put_many([1, 2])
+        self.assertEqual(fluteline.stop(nodes, timeout=0.2), [])
+
+    def test_unstarted_nodes(self):
+        nodes = [Producer(), Consumer()]
+        fluteline.connect(nodes)
+        self.assertEqual(fluteline.stop(nodes, timeout=0.1), [])
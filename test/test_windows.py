@@ -0,0 +1,94 @@
+import random
+import unittest
+
+import fluteline
+
+
+class TestCountWindow(unittest.TestCase):
+
+    def test_tumbling(self):
+        window = fluteline.CountWindow(3)
+        window.output = fluteline.Queue()
+        for i in [1, 5, 3, 2, 2, 8, 4]:
+            window.consume(i)
+        self.assertEqual(window.output.get_many(10), [
+            {'count': 3, 'sum': 9, 'mean': 3, 'min': 1, 'max': 5},
+            {'count': 3, 'sum': 12, 'mean': 4, 'min': 2, 'max': 8},
+        ])
+
+    def test_sliding_matches_recomputing(self):
+        window = fluteline.CountWindow(
+            50, 7, aggregates=['sum', 'min', 'max'], typecode='l',
+        )
+        window.output = fluteline.Queue()
+        values = [random.randint(-1000, 1000) for _ in range(1000)]
+        for value in values:
+            window.consume(value)
+        expected = []
+        for end in range(50, 1001):
+            if (end - 50) % 7 == 0:
+                chunk = values[end - 50:end]
+                expected.append({
+                    'sum': sum(chunk), 'min': min(chunk), 'max': max(chunk),
+                })
+        self.assertEqual(window.output.get_many(1000), expected)
+
+    def test_percentiles(self):
+        window = fluteline.CountWindow(
+            1000, 500, aggregates=['p50', 'p99'], key=lambda msg: msg['x'],
+        )
+        window.output = fluteline.Queue()
+        for i in range(2000):
+            window.consume({'x': float(i)})
+        for result, start in zip(window.output.get_many(10), [0, 500, 1000]):
+            self.assertAlmostEqual(result['p50'], start + 500, delta=10)
+            self.assertAlmostEqual(result['p99'], start + 990, delta=20)
+
+    def test_negative_percentiles(self):
+        window = fluteline.CountWindow(5, aggregates=['p50', 'p90'])
+        window.output = fluteline.Queue()
+        for value in [-100] * 5 + [-0.5] * 5 + [-3, -2, -1, 0, 1]:
+            window.consume(value)
+        results = window.output.get_many(10)
+        for result, expected in zip(results, [-100, -0.5]):
+            self.assertAlmostEqual(result['p50'], expected, delta=-expected / 50)
+            self.assertAlmostEqual(result['p90'], expected, delta=-expected / 50)
+        self.assertAlmostEqual(results[2]['p50'], -1, delta=0.02)
+        self.assertEqual(results[2]['p90'], 0)
+
+    def test_unknown_aggregate(self):
+        with self.assertRaises(ValueError):
+            fluteline.CountWindow(10, aggregates=['median'])
+
+
+class TestTimeWindow(unittest.TestCase):
+
+    def test_sliding(self):
+        window = fluteline.TimeWindow(
+            2, 1, aggregates=['count', 'max'], timestamp=lambda msg: msg[0],
+            key=lambda msg: msg[1],
+        )
+        window.output = fluteline.Queue()
+        for msg in [(0.5, 1), (1.5, 4), (1.7, 2), (2.1, 3), (7.2, 0), (8, 0)]:
+            window.consume(msg)
+        self.assertEqual(window.output.get_many(10), [
+            {'count': 1, 'max': 1, 'start': -1, 'end': 1},
+            {'count': 3, 'max': 4, 'start': 0, 'end': 2},
+            {'count': 3, 'max': 4, 'start': 1, 'end': 3},
+            {'count': 1, 'max': 3, 'start': 2, 'end': 4},
+            {'count': 1, 'max': 0, 'start': 6, 'end': 8},
+        ])
+        window.exit()
+        self.assertEqual(window.output.get_many(10), [
+            {'count': 2, 'max': 0, 'start': 7, 'end': 9},
+            {'count': 1, 'max': 0, 'start': 8, 'end': 10},
+        ])
+
+    def test_in_a_line(self):
+        nodes = [fluteline.TimeWindow(0.05, aggregates=['count'])]
+        fluteline.connect(nodes)
+        fluteline.start(nodes)
+        nodes[0].put_many(list(range(10)))
+        fluteline.stop(nodes, timeout=1)  # Outputs the pending window
+        counts = [r['count'] for r in nodes[0].output.get_many(10)]
+        self.assertEqual(sum(counts), 10)